@@ -0,0 +1,5 @@
+"""Offline benchmarks for steam.ext.tf2's hot paths.
+
+Run them with ``python -m benchmarks`` from the root of the repository after installing the extension. Nothing here
+connects to Steam, the HTTP and websocket layers are replaced with stubs that serve synthetic data.
+"""
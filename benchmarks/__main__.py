@@ -0,0 +1,151 @@
+"""Run the benchmarks, ``python -m benchmarks --sizes 100 1000 3000``."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import inspect
+import itertools
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional
+
+from steam.ext.tf2 import Metal
+from steam.ext.tf2.protobufs import base, sdk
+
+from . import synthetic
+from .stubs import make_client
+
+ITEMS_GAME_URL = "http://media.steampowered.com/apps/440/scripts/items/items_game.synthetic.txt"
+
+
+async def bench(
+    name: str,
+    size: Any,
+    func: Callable[[], Awaitable[Any] | Any],
+    *,
+    setup: Optional[Callable[[], Awaitable[Any]]] = None,
+    number: int = 1,
+    repeat: int = 5,
+) -> float:
+    """Print and return the best time of ``repeat`` runs of ``func`` called ``number`` times in a row."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            await setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            result = func()
+            if inspect.isawaitable(result):
+                await result
+        best = min(best, (time.perf_counter() - start) / number)
+    print(f"{name:<45} {size!s:>7} {best * 1000:>11.3f} ms")
+    return best
+
+
+async def bench_schema(repeat: int) -> None:
+    _, state = make_client({}, {ITEMS_GAME_URL: synthetic.items_game()})
+    msg = base.UpdateItemSchema(items_game_url=ITEMS_GAME_URL)
+    versions = itertools.count(1)
+
+    async def fresh_schema() -> None:
+        # a new version each run so the shared registry doesn't just hand back the last run's schema
+        msg.item_schema_version = next(versions)
+        if hasattr(state, "schema"):
+            del state.schema
+        state.schema_version = None
+        state.item_names = None
+
+    await bench(
+        "parse_schema",
+        f"{synthetic.FILLER_DEFS}d",
+        lambda: state.parse_schema(msg),
+        setup=fresh_schema,
+        repeat=repeat,
+    )
+
+
+async def bench_size(size: int, repeat: int) -> None:
+    created = 10
+    backpack = synthetic.make_backpack(size + created)
+    cached, new = backpack.cso_items[:size], backpack.cso_items[size:]
+    subscribed = synthetic.SyntheticBackpack(cso_items=cached, version=backpack.version)
+    cache_msg = synthetic.cache_subscribed(subscribed)
+    raw_cache = bytes(cache_msg)
+
+    full_inventory = backpack.inventory
+    cached_ids = {str(item.id) for item in cached}
+    cached_inventory = full_inventory | {
+        "assets": [asset for asset in full_inventory["assets"] if asset["assetid"] in cached_ids]
+    }
+
+    client, state = make_client(cached_inventory, {ITEMS_GAME_URL: synthetic.items_game()})
+    await state.parse_schema(base.UpdateItemSchema(items_game_url=ITEMS_GAME_URL))
+
+    async def fresh_backpack() -> None:
+        client.http.inventory = cached_inventory
+        state.backpack = None  # type: ignore
+        state.so_version = None
+        await state.parse_cache_subscribe(cache_msg)
+        client.http.inventory = full_inventory  # items from SOCreate are only in the web inventory "later"
+
+    await bench("decode CacheSubscribed", size, lambda: sdk.CacheSubscribed().parse(raw_cache), repeat=repeat)
+    await bench(
+        "parse_cache_subscribe",
+        size,
+        lambda: state.parse_cache_subscribe(cache_msg),
+        setup=fresh_backpack,
+        repeat=repeat,
+    )
+
+    update = synthetic.so_update_multiple(subscribed, min(size, 100))
+    await bench(
+        f"update_backpack ({len(update.objects)} moved)",
+        size,
+        lambda: state.handle_multiple_so_update(update),
+        setup=fresh_backpack,
+        repeat=repeat,
+    )
+
+    creates = [synthetic.so_create(backpack, item) for item in new]
+
+    async def create_all() -> None:
+        for msg in creates:
+            await state.parse_item_add(msg)
+
+    await bench(f"SOCreate ({created} unknown items)", size, create_all, setup=fresh_backpack, repeat=repeat)
+
+    destroys = [synthetic.so_destroy(subscribed, item) for item in random.Random(0).sample(cached, min(size, 10))]
+
+    async def destroy_all() -> None:
+        for msg in destroys:
+            await state.handle_item_remove(msg)
+
+    await bench(f"SODestroy ({len(destroys)} items)", size, destroy_all, setup=fresh_backpack, repeat=repeat)
+
+    await fresh_backpack()
+    items = list(state.backpack)
+    await bench("BackpackItem.sku (every item)", size, lambda: [item.sku for item in items], repeat=repeat)
+
+    scraps = [random.Random(i).randrange(1, 9 * 300) for i in range(size)]
+    values = [Metal(scrap) for scrap in scraps]
+    await bench("Metal sum", size, lambda: sum(values, Metal(0)), repeat=repeat)
+    strings = [f"{scrap // 9}.{scrap % 9}{scrap % 9}" for scrap in scraps]
+    await bench("Metal from str", size, lambda: [Metal(string) for string in strings], repeat=repeat)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 3000], help="backpack sizes to test")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark, the best is reported")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<45} {'size':>7} {'best':>14}")
+    await bench_schema(args.repeat)
+    for size in args.sizes:
+        await bench_size(size, args.repeat)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
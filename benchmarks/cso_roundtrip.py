@@ -0,0 +1,170 @@
+"""Check the hand-written decoder in ``steam.ext.tf2.protobufs.cso`` against betterproto's.
+
+Random items are encoded with :class:`base.Item`, with fields neither decoder knows about mixed into the item and its
+nested messages, and every field ``cso.Item().parse`` decodes is compared with what betterproto decodes from the same
+bytes, including the lazily decoded ``attribute`` (and its ``value_bytes``), ``equipped_state`` and nested
+``interior_item``.
+
+``python -m benchmarks.cso_roundtrip --count 10000`` exits with a non-zero status if any item decodes differently.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+
+import betterproto
+
+from steam.ext.tf2.protobufs import base, cso
+
+SCALAR_FIELDS = (
+    "id",
+    "account_id",
+    "inventory",
+    "def_index",
+    "quantity",
+    "level",
+    "quality",
+    "flags",
+    "origin",
+    "custom_name",
+    "custom_description",
+    "in_use",
+    "style",
+    "original_id",
+    "contains_equipped_state",
+    "contains_equipped_state_v2",
+)
+UINT32_MAX = 2**32 - 1
+UINT64_MAX = 2**64 - 1
+
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def unknown_fields(rng: random.Random) -> bytes:
+    """Some fields of every wire type with numbers past any that are in the messages."""
+    out = bytearray()
+    for _ in range(rng.randrange(4)):
+        field = rng.randrange(20, 2**12)
+        wire_type = rng.choice((cso.VARINT, cso.FIXED64, cso.LENGTH_DELIMITED, cso.FIXED32))
+        out += encode_varint(field << 3 | wire_type)
+        if wire_type == cso.VARINT:
+            out += encode_varint(rng.randrange(UINT64_MAX))
+        elif wire_type == cso.FIXED64:
+            out += rng.randbytes(8)
+        elif wire_type == cso.LENGTH_DELIMITED:
+            payload = rng.randbytes(rng.randrange(200))  # long enough for a multi-byte length
+            out += encode_varint(len(payload)) + payload
+        else:
+            out += rng.randbytes(4)
+    return bytes(out)
+
+
+def random_item(rng: random.Random, depth: int = 0) -> base.Item:
+    # nested messages are never all defaults, betterproto encodes those with the wrong field number
+    attributes = [
+        base.ItemAttribute(
+            def_index=rng.randrange(1, 4000),
+            value=rng.choice((0, rng.randrange(UINT32_MAX))),
+            value_bytes=rng.randbytes(rng.randrange(40)) if rng.random() < 0.3 else b"",
+        )
+        for _ in range(rng.randrange(6))
+    ]
+    equipped_state = [
+        base.ItemEquipped(new_class=rng.randrange(1, 10), new_slot=rng.randrange(20)) for _ in range(rng.randrange(3))
+    ]
+    for message in (*attributes, *equipped_state):
+        message._unknown_fields = unknown_fields(rng)
+
+    item = base.Item(
+        id=rng.randrange(UINT64_MAX),
+        account_id=rng.randrange(UINT32_MAX),
+        inventory=rng.randrange(UINT32_MAX),
+        def_index=rng.randrange(30000),
+        quantity=rng.randrange(2),
+        level=rng.randrange(101),
+        quality=rng.randrange(16),
+        flags=rng.randrange(2**10),
+        origin=rng.randrange(30),
+        custom_name=rng.choice(("", "Wrench", "Ünicode ☃ name")),
+        custom_description=rng.choice(("", "x" * 300)),
+        attribute=attributes,
+        in_use=rng.random() < 0.5,
+        style=rng.randrange(5),
+        original_id=rng.randrange(UINT64_MAX),
+        contains_equipped_state=rng.random() < 0.5,
+        equipped_state=equipped_state,
+        contains_equipped_state_v2=rng.random() < 0.5,
+    )
+    if depth < 2 and rng.random() < 0.3:  # gift wrapped items, which can themselves be wrapped
+        item.interior_item = random_item(rng, depth + 1)
+    item._unknown_fields = unknown_fields(rng)
+    return item
+
+
+def compare(expected: base.Item, actual: cso.Item, path: str = "item") -> list[str]:
+    """The differences between betterproto's and the hand-written decoding of an item."""
+    differences = [
+        f"{path}.{name}: {getattr(actual, name)!r} != {getattr(expected, name)!r}"
+        for name in SCALAR_FIELDS
+        if getattr(actual, name) != getattr(expected, name)
+    ]
+
+    expected_attributes = [(a.def_index, a.value, bytes(a.value_bytes)) for a in expected.attribute]
+    actual_attributes = [(a.def_index, a.value, bytes(a.value_bytes)) for a in actual.attribute]
+    if actual_attributes != expected_attributes:
+        differences.append(f"{path}.attribute: {actual_attributes!r} != {expected_attributes!r}")
+
+    expected_equipped = [(e.new_class, e.new_slot) for e in expected.equipped_state]
+    actual_equipped = [(e.new_class, e.new_slot) for e in actual.equipped_state]
+    if actual_equipped != expected_equipped:
+        differences.append(f"{path}.equipped_state: {actual_equipped!r} != {expected_equipped!r}")
+
+    has_interior = betterproto.serialized_on_wire(expected.interior_item)
+    if actual.interior_item is None:
+        if has_interior:
+            differences.append(f"{path}.interior_item is missing")
+    elif not has_interior:
+        differences.append(f"{path}.interior_item shouldn't be set")
+    else:
+        differences += compare(expected.interior_item, actual.interior_item, f"{path}.interior_item")
+    return differences
+
+
+def check(rng: random.Random) -> list[str]:
+    # unknown fields before the known ones too, the decoders have to skip them wherever they are
+    data = unknown_fields(rng) + bytes(random_item(rng))
+    actual = cso.Item().parse(data)
+    differences = compare(base.Item().parse(data), actual)
+    if bytes(actual._data) != data:
+        differences.append("item._data isn't the bytes it was parsed from")
+    return differences
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.cso_roundtrip", description=__doc__)
+    parser.add_argument("--count", type=int, default=1000, help="how many random items to check")
+    parser.add_argument("--seed", type=int, default=None, help="seed the items to reproduce a failure")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2**32)
+    rng = random.Random(seed)
+    for idx in range(args.count):
+        differences = check(rng)
+        if differences:
+            print(f"item {idx} (--seed {seed}) decoded differently:", *differences, sep="\n  ", file=sys.stderr)
+            return 1
+    print(f"{args.count} items decoded the same as betterproto (--seed {seed})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""An in-process stand-in for the TF2 Game Coordinator.
+
+:class:`SimulatedGC` takes the place of the client's websocket, answering the GC messages the client sends with the
+same messages the real GC would, after a configurable delay. Messages can also be dropped and, with ``jitter``,
+delivered out of order. The web inventory and ``items_game_url`` are served from memory.
+
+``python -m benchmarks.gc_simulator --crafts 200 --latency 0.05 --jitter 0.02`` measures :meth:`Client.craft`
+throughput against it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import struct
+import time
+from collections import Counter
+from typing import Any
+
+from steam.app import TF2
+from steam.ext import tf2
+from steam.ext.tf2.enums import Language
+from steam.ext.tf2.protobufs import base, sdk, struct_messages
+
+from . import synthetic
+from .stubs import make_client
+
+log = logging.getLogger(__name__)
+
+ITEMS_GAME_URL = "http://media.steampowered.com/apps/440/scripts/items/items_game.simulated.txt"
+SCRAP, RECLAIMED, REFINED = 5000, 5001, 5002
+NAMES = {def_index: name for def_index, name, *_ in synthetic.ITEM_DEFS}
+
+
+def includes_tf2(apps: Any) -> bool:
+    for app in apps or ():
+        values = app.values() if isinstance(app, dict) else (getattr(app, "id", None),)
+        if TF2.id in values:
+            return True
+    return False
+
+
+class SimulatedGC:
+    """A fake GC for ``client``, whose backpack starts off as ``backpack``.
+
+    Parameters
+    ----------
+    latency
+        Seconds before a response is delivered.
+    jitter
+        Up to this many extra seconds are added to each response's delay, so responses can overtake each other.
+    drop_rate
+        The chance that a response is never delivered.
+    inventory_delay
+        Seconds before a new item shows up in the web inventory, to exercise the missing item handling.
+    """
+
+    def __init__(
+        self,
+        client: tf2.Client,
+        backpack: synthetic.SyntheticBackpack,
+        *,
+        latency: float = 0,
+        jitter: float = 0,
+        drop_rate: float = 0,
+        inventory_delay: float = 0,
+        seed: int = 0,
+    ):
+        self.client = client
+        self.state = client._connection
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.inventory_delay = inventory_delay
+        self.rng = random.Random(seed)
+
+        self.version = backpack.version
+        self.items = {item.id: item for item in backpack.cso_items}
+        self.assets = {int(asset["assetid"]): asset for asset in backpack.inventory["assets"]}
+        self.descriptions = {
+            (description["classid"], description["instanceid"]): description
+            for description in backpack.inventory["descriptions"]
+        }
+        self.next_id = max(self.items, default=synthetic.OWNER) + 1
+        self.pending_assets: dict[int, asyncio.TimerHandle] = {}  # items that aren't in the web inventory yet
+
+        self.sent = Counter[str]()
+        self.received = Counter[str]()
+        self.dropped = 0
+        self.handlers = {
+            struct_messages.CraftRequest: self.on_craft,
+            base.SetItemPositions: self.on_set_item_positions,
+            sdk.CacheSubscriptionRefresh: self.on_cache_subscription_refresh,
+            base.RequestInventoryRefresh: self.on_request_inventory_refresh,
+        }
+
+        client.ws = self  # type: ignore
+        client.http._session.pages[ITEMS_GAME_URL] = synthetic.items_game()
+        self.update_web_inventory()
+
+    @classmethod
+    def create(cls, size: int, **options: Any) -> SimulatedGC:
+        """Make a client with a ``size`` item backpack and a simulated GC for it."""
+        client, _ = make_client({})
+        return cls(client, synthetic.make_backpack(size), **options)
+
+    def __repr__(self) -> str:
+        return f"<SimulatedGC items={len(self.items)} sent={sum(self.sent.values())} dropped={self.dropped}>"
+
+    # delivery
+
+    def reply(self, language: Language, msg: Any, *, reliable: bool = False) -> None:
+        if not reliable and self.rng.random() < self.drop_rate:
+            self.dropped += 1
+            return log.debug(f"Dropped {language!r}")
+        delay = self.latency + self.rng.random() * self.jitter
+        self.state.loop.call_later(delay, self.receive, language, msg)
+
+    def receive(self, language: Language, msg: Any) -> None:
+        self.received[language.name] += 1
+        self.state.dispatch("gc_message_receive", msg)
+        self.state.run_parser(language, msg)
+
+    async def start_session(self) -> None:
+        """Do what the GC does after the client starts playing TF2."""
+        self.receive(Language.ClientWelcome, base.ClientWelcome())  # always first so the cache makes the GC ready
+        self.reply(Language.UpdateItemSchema, base.UpdateItemSchema(items_game_url=ITEMS_GAME_URL), reliable=True)
+        self.reply(Language.SOCacheSubscribed, self.cache_subscribed(), reliable=True)
+
+    # the websocket's interface
+
+    async def send_gc_message(self, msg: Any) -> int:
+        body = getattr(msg, "body", msg)  # GCMsgProto wrappers
+        self.sent[body.__class__.__name__] += 1
+        handler = self.handlers.get(body.__class__)
+        if handler is not None:
+            handler(body)
+        return 0
+
+    async def change_presence(self, **kwargs: Any) -> None:
+        if includes_tf2(kwargs.get("apps", kwargs.get("games"))):
+            await self.start_session()
+
+    # the simulated GC's backpack
+
+    def cache_subscribed(self) -> sdk.CacheSubscribed:
+        backpack = synthetic.SyntheticBackpack(cso_items=list(self.items.values()), version=self.version)
+        return synthetic.cache_subscribed(backpack)
+
+    def web_inventory(self) -> dict[str, Any]:
+        return {
+            "assets": list(self.assets.values()),
+            "descriptions": list(self.descriptions.values()),
+            "total_inventory_count": len(self.assets),
+            "success": 1,
+        }
+
+    def update_web_inventory(self) -> None:
+        self.client.http.inventory = self.web_inventory()
+
+    def add_asset(self, item: base.Item) -> None:
+        class_id, instance_id = str(item.def_index * 100 + item.quality), "0"
+        if (class_id, instance_id) not in self.descriptions:
+            self.descriptions[class_id, instance_id] = synthetic.make_description(
+                class_id,
+                instance_id,
+                NAMES.get(item.def_index, f"Filler Item {item.def_index}"),
+                item.quality,
+                "craft_item",
+                True,
+                None,
+                rng=self.rng,
+            )
+        self.assets[item.id] = {
+            "appid": 440,
+            "contextid": "2",
+            "assetid": str(item.id),
+            "classid": class_id,
+            "instanceid": instance_id,
+            "amount": "1",
+        }
+        self.update_web_inventory()
+
+    def free_position(self) -> int:
+        used = {item.inventory & 0xFFFF for item in self.items.values()}
+        return next(position for position in range(1, len(used) + 2) if position not in used)
+
+    def add_pending_asset(self, item_id: int) -> None:
+        del self.pending_assets[item_id]
+        item = self.items.get(item_id)
+        if item is not None:
+            self.add_asset(item)
+
+    def create_item(self, def_index: int, *, notify: bool = True) -> base.Item:
+        """Make a new item, sending an SOCreate for it unless ``notify`` is ``False``."""
+        item = base.Item(
+            id=self.next_id,
+            account_id=synthetic.ACCOUNT_ID,
+            inventory=0x80000000 | self.free_position(),
+            def_index=def_index,
+            quantity=1,
+            level=1,
+            quality=6,
+            origin=4,  # crafted
+            original_id=self.next_id,
+        )
+        self.next_id += 1
+        self.items[item.id] = item
+        self.version += 1
+        if self.inventory_delay and notify:
+            handle = self.state.loop.call_later(self.inventory_delay, self.add_pending_asset, item.id)
+            self.pending_assets[item.id] = handle
+        else:
+            self.add_asset(item)
+        if notify:
+            self.reply(Language.SOCreate, sdk.SOCreate(type_id=1, object_data=bytes(item), version=self.version))
+        return item
+
+    def destroy_item(self, item: base.Item) -> None:
+        del self.items[item.id]
+        self.assets.pop(item.id, None)
+        self.version += 1
+        self.reply(Language.SODestroy, sdk.SODestroy(type_id=1, object_data=bytes(item), version=self.version))
+
+    # handlers for messages from the client
+
+    def on_craft(self, msg: struct_messages.CraftRequest) -> None:
+        inputs = [self.items.get(item_id) for item_id in msg.items]
+        def_indices = [item.def_index for item in inputs if item is not None]
+        if len(def_indices) != len(inputs) or not inputs:
+            return self.reply(Language.CraftResponse, craft_response(-1, []))
+
+        if def_indices == [SCRAP] * 3:
+            outputs = [RECLAIMED]
+        elif def_indices == [RECLAIMED] * 3:
+            outputs = [REFINED]
+        elif def_indices == [REFINED]:
+            outputs = [RECLAIMED] * 3
+        elif def_indices == [RECLAIMED]:
+            outputs = [SCRAP] * 3
+        else:
+            outputs = [SCRAP]
+
+        for item in inputs:
+            self.destroy_item(item)  # type: ignore
+        self.update_web_inventory()
+        created = [self.create_item(def_index) for def_index in outputs]
+        recipe = msg.recipe if msg.recipe != -2 else 0
+        self.reply(Language.CraftResponse, craft_response(recipe, [item.id for item in created]))
+
+    def on_set_item_positions(self, msg: base.SetItemPositions) -> None:
+        objects = []
+        for position in msg.item_positions:
+            item = self.items.get(position.item_id)
+            if item is None:
+                continue
+            item.inventory = 0x80000000 | position.position
+            objects.append(sdk.MultipleObjectsSingleObject(type_id=1, object_data=bytes(item)))
+        self.version += 1
+        self.reply(Language.SOUpdateMultiple, sdk.MultipleObjects(objects=objects, version=self.version))
+
+    def on_cache_subscription_refresh(self, msg: sdk.CacheSubscriptionRefresh) -> None:
+        self.reply(Language.SOCacheSubscribed, self.cache_subscribed())
+
+    def on_request_inventory_refresh(self, msg: base.RequestInventoryRefresh) -> None:
+        for item_id, handle in list(self.pending_assets.items()):  # the web inventory catches up straight away
+            handle.cancel()
+            self.add_pending_asset(item_id)
+
+
+def craft_response(recipe_id: int, ids: list[int]) -> struct_messages.CraftResponse:
+    data = struct.pack(f"<hIh{len(ids)}Q", recipe_id, 0, len(ids), *ids)
+    return struct_messages.CraftResponse().parse(data)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.gc_simulator", description=__doc__)
+    parser.add_argument("--size", type=int, default=1000, help="items in the starting backpack")
+    parser.add_argument("--crafts", type=int, default=100, help="scrap metal crafts to do")
+    parser.add_argument("--concurrency", type=int, default=1, help="crafts to do at once")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--inventory-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    gc = SimulatedGC.create(
+        args.size,
+        latency=args.latency,
+        jitter=args.jitter,
+        drop_rate=args.drop_rate,
+        inventory_delay=args.inventory_delay,
+    )
+    for _ in range(args.crafts * 3):  # make sure there is enough scrap
+        gc.create_item(SCRAP, notify=False)
+    await gc.start_session()
+    await gc.client.wait_for_gc_ready()
+
+    scrap = [item for item in gc.state.backpack if item.def_index == SCRAP]
+    batches = [scrap[idx : idx + 3] for idx in range(0, args.crafts * 3, 3)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failed = 0
+
+    async def craft(batch: list[tf2.BackpackItem]) -> None:
+        nonlocal failed
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(gc.client.craft(batch), timeout=max(5, args.latency * 20))
+            except asyncio.TimeoutError:
+                result = None
+            failed += result is None
+
+    start = time.perf_counter()
+    await asyncio.gather(*(craft(batch) for batch in batches))
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(batches)} crafts in {elapsed:.3f}s ({len(batches) / elapsed:.1f}/s), {failed} failed")
+    print(f"sent: {dict(gc.sent)}")
+    print(f"received: {dict(gc.received)}")
+    print(f"dropped: {gc.dropped}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
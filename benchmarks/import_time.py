@@ -0,0 +1,65 @@
+"""Measure how long importing the extension takes.
+
+Each statement is run in a fresh interpreter with ``-X importtime`` and the time spent in ``steam.ext.tf2``'s own
+modules is reported, so steam.py's (which can't be avoided) doesn't drown it out.
+
+``python -m benchmarks.import_time --max-ms 15`` exits with a non-zero status if importing :class:`Metal` takes longer
+than that, to catch regressions like a module going back to importing the client at import time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+
+STATEMENTS = {
+    "package": "import steam.ext.tf2",
+    "Metal": "from steam.ext.tf2 import Metal",
+    "ItemVariant": "from steam.ext.tf2 import ItemVariant",
+    "Client": "from steam.ext.tf2 import Client",
+}
+PREFIX = "steam.ext.tf2"
+
+
+def measure(statement: str) -> tuple[float, int]:
+    """Run ``statement`` and return the milliseconds spent importing the extension's modules and how many it
+    imported.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True
+    )
+    total = 0
+    modules = 0
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        name = name.strip()
+        if name == PREFIX or name.startswith(f"{PREFIX}."):
+            total += int(self_us)
+            modules += 1
+    return total / 1000, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time", description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5, help="interpreters to start per statement, the best is used")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if importing Metal takes longer than this")
+    args = parser.parse_args()
+
+    results: dict[str, float] = {}
+    for name, statement in STATEMENTS.items():
+        runs = [measure(statement) for _ in range(args.repeat)]
+        best, modules = min(runs)
+        results[name] = best
+        print(f"{name:<12} {best:8.2f}ms  {modules:>3} modules  ({statement})")
+
+    if args.max_ms is not None and results["Metal"] > args.max_ms:
+        print(f"importing Metal took {results['Metal']:.2f}ms, more than {args.max_ms}ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
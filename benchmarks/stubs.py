@@ -0,0 +1,56 @@
+"""Stand-ins for the parts of a client that would otherwise talk to Steam."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from steam.ext import tf2
+from steam.ext.tf2.state import GCState
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self._text = text
+
+    async def text(self) -> str:
+        return self._text
+
+
+class StubSession:
+    """Serves every URL from a dict, e.g. ``items_game_url``."""
+
+    def __init__(self, pages: dict[str, str]):
+        self.pages = pages
+
+    async def get(self, url: str, **kwargs: Any) -> StubResponse:
+        return StubResponse(self.pages[url])
+
+
+class StubWebSocket:
+    """Records the GC messages that are sent."""
+
+    def __init__(self) -> None:
+        self.sent: list[Any] = []
+
+    async def send_gc_message(self, msg: Any) -> None:
+        self.sent.append(msg)
+
+
+def make_client(inventory: dict[str, Any], pages: dict[str, str] | None = None) -> tuple[tf2.Client, GCState]:
+    """Make a client that is "ready" and serves ``inventory`` as its web inventory without logging in.
+
+    The inventory can be swapped out later with ``client.http.inventory = ...``.
+    """
+    client = tf2.Client()
+    http = client.http
+    http.inventory = inventory
+
+    async def get_inventory(*args: Any, **kwargs: Any) -> dict[str, Any]:
+        return http.inventory
+
+    http.get_client_user_inventory = get_inventory
+    http.get_user_inventory = get_inventory
+    http._session = StubSession(pages or {})
+    client.ws = StubWebSocket()
+    client._ready.set()
+    return client, client._connection
@@ -0,0 +1,216 @@
+"""Generators for synthetic but realistically shaped SO caches, web inventories and item schemas."""
+
+from __future__ import annotations
+
+import random
+import struct
+from dataclasses import dataclass, field
+from typing import Any
+
+from steam.ext.tf2.protobufs import base, sdk
+
+OWNER = 76561198000000000
+ACCOUNT_ID = OWNER & 0xFFFFFFFF
+
+# def index, name, item class, craft class
+ITEM_DEFS = [
+    (5000, "Scrap Metal", "craft_item", "craft_bar"),
+    (5001, "Reclaimed Metal", "craft_item", "craft_bar"),
+    (5002, "Refined Metal", "craft_item", "craft_bar"),
+    (5021, "Mann Co. Supply Crate Key", "tool", "tool"),
+    (143, "Earbuds", "tf_wearable", "hat"),
+    (30469, "Horace", "tf_wearable", "hat"),
+    (378, "Team Captain", "tf_wearable", "hat"),
+    (200, "Upgradeable TF_WEAPON_SCATTERGUN", "tf_weapon_scattergun", "weapon"),
+    (205, "Upgradeable TF_WEAPON_ROCKETLAUNCHER", "tf_weapon_rocketlauncher", "weapon"),
+    (15059, "concealedkiller_sniperrifle_nightowl", "tf_weapon_sniperrifle", "weapon"),
+    (5050, "Backpack Expander", "tool", "tool"),
+    (5826, "Mann Co. Supply Munition #82", "supply_crate", "supply_crate"),
+]
+# extra made up def indexes so the schema is roughly the size of the real one
+FILLER_DEFS = 6000
+
+QUALITIES = {0: "Normal", 3: "Vintage", 5: "Unusual", 6: "Unique", 11: "Strange", 15: "Decorated Weapon"}
+QUALITY_WEIGHTS = {6: 60, 11: 15, 5: 8, 3: 7, 15: 5, 0: 5}
+CLASSES = ["Scout", "Soldier", "Pyro", "Demoman", "Heavy", "Engineer", "Medic", "Sniper", "Spy"]
+WEARS = ["Factory New", "Minimal Wear", "Field-Tested", "Well-Worn", "Battle Scarred"]
+
+
+@dataclass
+class SyntheticBackpack:
+    cso_items: list[base.Item] = field(default_factory=list)
+    inventory: dict[str, Any] = field(default_factory=dict)
+    version: int = 1
+
+    def cso_bytes(self) -> list[bytes]:
+        return [bytes(item) for item in self.cso_items]
+
+
+def make_backpack(size: int, *, seed: int = 0) -> SyntheticBackpack:
+    """Make ``size`` items as both CSO items and the matching web inventory."""
+    rng = random.Random(seed)
+    backpack = SyntheticBackpack(version=rng.randrange(1 << 40))
+    assets: list[dict[str, Any]] = []
+    descriptions: dict[tuple[str, str], dict[str, Any]] = {}
+    qualities, weights = zip(*QUALITY_WEIGHTS.items())
+
+    for position in range(1, size + 1):
+        def_index, name, item_class, craft_class = rng.choice(ITEM_DEFS)
+        quality = 6 if craft_class in ("craft_bar", "tool") else rng.choices(qualities, weights)[0]
+        item = make_cso_item(OWNER + position, def_index, quality, position, rng=rng)
+        backpack.cso_items.append(item)
+
+        craftable = rng.random() > 0.1
+        wear = WEARS[rng.randrange(len(WEARS))] if quality == 15 else None
+        class_id = str(def_index * 100 + quality)
+        instance_id = "0" if craftable else "1"
+        assets.append(
+            {
+                "appid": 440,
+                "contextid": "2",
+                "assetid": str(item.id),
+                "classid": class_id,
+                "instanceid": instance_id,
+                "amount": "1",
+            }
+        )
+        if (class_id, instance_id) not in descriptions:
+            descriptions[class_id, instance_id] = make_description(
+                class_id, instance_id, name, quality, item_class, craftable, wear, rng=rng
+            )
+
+    backpack.inventory = {
+        "assets": assets,
+        "descriptions": list(descriptions.values()),
+        "total_inventory_count": size,
+        "success": 1,
+        "rwgrsn": -2,
+    }
+    return backpack
+
+
+def make_cso_item(item_id: int, def_index: int, quality: int, position: int, *, rng: random.Random) -> base.Item:
+    attributes = [base.ItemAttribute(def_index=214, value_bytes=rng.randbytes(4))] if quality == 11 else []
+    if quality == 5:
+        effect = struct.pack("<f", rng.randrange(6, 120))  # float attributes are sent as their bits
+        attributes.append(base.ItemAttribute(def_index=134, value_bytes=effect))
+    if rng.random() < 0.05:
+        attributes.append(base.ItemAttribute(def_index=142, value_bytes=rng.randbytes(4)))  # painted
+    return base.Item(
+        id=item_id,
+        account_id=ACCOUNT_ID,
+        inventory=0x80000000 | position,
+        def_index=def_index,
+        quantity=1,
+        level=rng.randrange(1, 100),
+        quality=quality,
+        flags=rng.choice((0, 0, 0, 0x2, 0x10)),
+        origin=rng.randrange(0, 24),
+        custom_name="Renamed" if rng.random() < 0.02 else "",
+        attribute=attributes,
+        original_id=item_id,
+    )
+
+
+def make_description(
+    class_id: str,
+    instance_id: str,
+    name: str,
+    quality: int,
+    item_class: str,
+    craftable: bool,
+    wear: str | None,
+    *,
+    rng: random.Random,
+) -> dict[str, Any]:
+    prefix = "" if quality == 6 else f"{QUALITIES[quality]} "
+    market_name = f"{prefix}{name}{f' ({wear})' if wear else ''}"
+    lines = [{"value": "( Not Usable in Crafting )"}] if not craftable else []
+    lines += [{"value": f"Level {rng.randrange(1, 100)} {item_class}", "color": "756b5e"}]
+    classes = rng.sample(CLASSES, rng.randrange(1, 4))
+    return {
+        "appid": 440,
+        "classid": class_id,
+        "instanceid": instance_id,
+        "icon_url": "fWFc82js0fmoRAP-qOIPu5THSWqfSmTELLqcUywGkijVjZULUrsm1j-9xgEAaR4uURrwvz0N252yVaDVWrRTno9m4ccG2",
+        "tradable": 1,
+        "name": f"{prefix}{name}",
+        "market_hash_name": market_name,
+        "market_name": market_name,
+        "name_color": "7D6D00",
+        "type": f"Level {rng.randrange(1, 100)} {item_class}",
+        "descriptions": lines,
+        "tags": [
+            {"category": "Quality", "internal_name": QUALITIES[quality], "localized_tag_name": QUALITIES[quality]},
+            {"category": "Type", "internal_name": "misc", "localized_tag_name": "Cosmetic"},
+            *({"category": "Class", "internal_name": c, "localized_tag_name": c} for c in classes),
+        ],
+        "marketable": 1,
+        "commodity": 0,
+        "market_tradable_restriction": 7,
+        "market_marketable_restriction": 0,
+    }
+
+
+def cache_subscribed(backpack: SyntheticBackpack, *, additional_slots: int = 2700) -> sdk.CacheSubscribed:
+    account = bytes(base.GameAccountClient(additional_backpack_slots=additional_slots))
+    return sdk.CacheSubscribed(
+        owner=OWNER,
+        version=backpack.version,
+        objects=[
+            sdk.CacheSubscribedSubscribedType(type_id=7, object_data=[account]),
+            sdk.CacheSubscribedSubscribedType(type_id=1, object_data=backpack.cso_bytes()),
+        ],
+    )
+
+
+def so_update_multiple(backpack: SyntheticBackpack, count: int, *, seed: int = 0) -> sdk.MultipleObjects:
+    """Move ``count`` items to new positions, like sorting the backpack would."""
+    rng = random.Random(seed)
+    items = rng.sample(backpack.cso_items, min(count, len(backpack.cso_items)))
+    positions = rng.sample(range(1, len(backpack.cso_items) + 1), len(items))
+    objects = []
+    for item, position in zip(items, positions):
+        moved = base.Item().parse(bytes(item))
+        moved.inventory = 0x80000000 | position
+        objects.append(sdk.MultipleObjectsSingleObject(type_id=1, object_data=bytes(moved)))
+    return sdk.MultipleObjects(owner=OWNER, version=backpack.version + 1, objects=objects)
+
+
+def so_create(backpack: SyntheticBackpack, item: base.Item) -> sdk.SOCreate:
+    return sdk.SOCreate(owner=OWNER, type_id=1, object_data=bytes(item), version=backpack.version + 1)
+
+
+def so_destroy(backpack: SyntheticBackpack, item: base.Item) -> sdk.SODestroy:
+    return sdk.SODestroy(owner=OWNER, type_id=1, object_data=bytes(item), version=backpack.version + 1)
+
+
+def items_game(*, seed: int = 0) -> str:
+    """An ``items_game.txt`` containing :data:`ITEM_DEFS` and enough filler items to be about as large as the real
+    one.
+    """
+    rng = random.Random(seed)
+    lines = ['"items_game"', "{", '\t"items"', "\t{"]
+    filler = ((100000 + i, f"Filler Item {i}", "tf_wearable", "hat") for i in range(FILLER_DEFS))
+    for def_index, name, item_class, craft_class in (*ITEM_DEFS, *filler):
+        lines += [
+            f'\t\t"{def_index}"',
+            "\t\t{",
+            f'\t\t\t"name"\t"{name}"',
+            f'\t\t\t"prefab"\t"{"valve " if rng.random() < 0.5 else ""}base_{craft_class}"',
+            f'\t\t\t"item_class"\t"{item_class}"',
+            f'\t\t\t"craft_class"\t"{craft_class}"',
+            f'\t\t\t"item_quality"\t"unique"',
+            f'\t\t\t"min_ilevel"\t"{rng.randrange(1, 100)}"',
+            f'\t\t\t"max_ilevel"\t"{rng.randrange(1, 100)}"',
+            '\t\t\t"used_by_classes"',
+            "\t\t\t{",
+            *(f'\t\t\t\t"{c.lower()}"\t"1"' for c in rng.sample(CLASSES, rng.randrange(1, 4))),
+            "\t\t\t}",
+            "\t\t}",
+        ]
+    lines += ["\t}", '\t"qualities"', "\t{"]
+    for value, name in QUALITIES.items():
+        lines += [f'\t\t"{name.lower()}"', "\t\t{", f'\t\t\t"value"\t"{value}"', "\t\t}"]
+    lines += ["\t}", "}"]
+    return "\n".join(lines)
@@ -5,7 +5,56 @@ steam.ext.tf2
 A library for interacting with the TF2 Game Coordinator.
 """
 
-from .backpack import *
-from .client import *
-from .currency import *
-from .enums import *
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .backpack import *
+    from .client import *
+    from .converters import *
+    from .currency import *
+    from .enums import *
+    from .events import *
+    from .schema import *
+
+# the submodules are imported the first time one of their names is used, so a process that only needs e.g. Metal
+# doesn't import the client, its state and the protobufs
+SUBMODULES = {
+    "backpack": ("BackpackItem", "Backpack"),
+    "client": ("Client", "Bot"),
+    "converters": ("DefIndex", "SKU", "BackpackItemConverter", "DefIndexConverter", "SKUConverter"),
+    "currency": ("Metal",),
+    "enums": (
+        "GCGoodbyeReason",
+        "TradeResponse",
+        "Mercenary",
+        "ItemSlot",
+        "WearLevel",
+        "BackpackSortType",
+        "ItemFlags",
+        "ItemOrigin",
+        "ItemQuality",
+        "Language",
+    ),
+    "events": ("EventLimit",),
+    "schema": ("ItemNames", "ItemMatch", "ItemVariant", "SchemaDiff"),
+}
+LAZY_NAMES = {name: module for module, names in SUBMODULES.items() for name in names}
+
+__all__ = tuple(LAZY_NAMES)
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module = LAZY_NAMES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # so the next lookup doesn't go through here
+    return value
+
+
+def __dir__() -> list[str]:
+    return [*globals(), *LAZY_NAMES]
@@ -1,21 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import functools
+import json
+import os
 import re
-from collections.abc import Iterable
-from contextvars import ContextVar
-from typing import TYPE_CHECKING, Optional
+import zlib
+from collections.abc import Callable, Iterable
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final, Optional, TypeVar, Union
 
 from betterproto.casing import pascal_case
 
-from ...trade import BaseInventory, Item
+from ...enums import IntEnum
+from ...trade import Asset, BaseInventory, Item
 from ...user import User
 from .enums import BackpackSortType, ItemFlags, ItemOrigin, ItemQuality, ItemSlot, Mercenary, WearLevel
-from .protobufs import base, struct_messages
+from .protobufs import base, cso, struct_messages
+from .schema import AUSTRALIUM, SCHEMAS, WEAR, ItemVariant, raw_attributes, wear_from_attribute
 
 if TYPE_CHECKING:
 
+    from ...types.trade import Inventory as InventoryDict
+    from .schema import ItemNames
     from .state import GCState
-    from .types.schema import Schema
 
 __all__ = (
     "BackpackItem",
@@ -23,8 +34,86 @@ __all__ = (
 )
 
 
-WEAR_PARSER = re.compile("|".join(re.escape(wear.name) for wear in WearLevel))
-SCHEMA = ContextVar[Schema]("schema")
+WEAR_PARSER = re.compile("|".join(re.escape(wear.value) for wear in WearLevel))
+SNAPSHOT_FORMAT: Final = 1
+INDEXES: Final = ("def_index", "quality", "sku", "tradable", "craftable")
+T = TypeVar("T")
+E = TypeVar("E", bound=IntEnum)
+
+
+def cached_per_description(func: Callable[[BackpackItem], T]) -> Callable[[BackpackItem], T]:
+    """Cache the result of ``func`` between all the items that share a web description.
+
+    Only use this for things that come from the description alone, anything that reads the GC's data can differ
+    between items with the same description.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self: BackpackItem) -> T:
+        try:
+            cache = self._description_cache
+        except AttributeError:  # the item wasn't created by a Backpack
+            return func(self)
+        try:
+            return cache[func.__name__]
+        except KeyError:
+            cache[func.__name__] = result = func(self)
+            return result
+
+    return wrapper
+
+
+class EnumCache(dict[int, E]):
+    """A lookup table for ``enum.try_value`` that remembers previously seen values."""
+
+    def __init__(self, enum: type[E]):
+        super().__init__()
+        self.enum = enum
+
+    def __missing__(self, value: int) -> E:
+        self[value] = member = self.enum.try_value(value)
+        return member
+
+
+QUALITIES = EnumCache(ItemQuality)
+FLAGS = EnumCache(ItemFlags)
+ORIGINS = EnumCache(ItemOrigin)
+
+
+def compile_cso_merger() -> Callable[[BackpackItem, cso.Item], None]:
+    """Generate a function that copies every field from a :class:`cso.Item` onto a :class:`BackpackItem`.
+
+    The generated function is straight line attribute assignments so it avoids a getattr/setattr pair per field.
+    """
+    special_cases = {
+        "def_index": "item._def_index = cso_item.def_index",
+        "quality": "item._quality = QUALITIES[cso_item.quality]",
+        "flags": "item.flags = FLAGS[cso_item.flags]",
+        "origin": "item.origin = ORIGINS[cso_item.origin]",
+    }
+    lines = [special_cases.get(name, f"item.{name} = cso_item.{name}") for name in cso.Item.__annotations__]
+    body = "\n    ".join([*lines, "item._cso = cso_item"])
+    namespace: dict[str, Any] = {}
+    exec(
+        f"def merge_cso_item(item, cso_item, QUALITIES=QUALITIES, FLAGS=FLAGS, ORIGINS=ORIGINS):\n    {body}\n",
+        {"QUALITIES": QUALITIES, "FLAGS": FLAGS, "ORIGINS": ORIGINS},
+        namespace,
+    )
+    return namespace["merge_cso_item"]
+
+
+merge_cso_item = compile_cso_merger()
+
+
+def write_snapshot(file: os.PathLike[str], snapshot: dict[str, Any]) -> None:
+    path = Path(file)
+    temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")  # write then rename so a crash never leaves half a file
+    try:
+        temp.write_bytes(zlib.compress(json.dumps(snapshot, separators=(",", ":")).encode()))
+        temp.replace(path)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
 
 
 class BackpackItem(Item):
@@ -52,16 +141,16 @@ class BackpackItem(Item):
         "origin",
         "custom_name",
         "custom_description",
-        "attribute",
-        "interior_item",
         "in_use",
         "style",
         "original_id",
         "contains_equipped_state",
-        "equipped_state",
         "contains_equipped_state_v2",
+        "_cso",
+        "_description_cache",
         "_quality",
         "_def_index",
+        "_variant",
     )
     REPR_ATTRS = (*Item.REPR_ATTRS, "position", "def_index")
     _state: GCState
@@ -76,17 +165,33 @@ class BackpackItem(Item):
     origin: ItemOrigin  #: The item's origin.
     custom_name: str
     custom_description: str
-    attribute: list[base.ItemAttribute]
-    interior_item: base.Item
     in_use: bool
     style: int
     original_id: int
     contains_equipped_state: bool
-    equipped_state: list[base.ItemEquipped]
     contains_equipped_state_v2: bool
+    _cso: cso.Item
+    _description_cache: dict[str, Any]
+    _variant: ItemVariant  # only set by from_sku
 
     # the other attribute definitions others not a clue please feel free to PR them
 
+    # these are decoded from the item's raw CSO data the first time they're accessed
+    @property
+    def attribute(self) -> list[cso.ItemAttribute]:
+        """The item's attributes."""
+        return self._cso.attribute
+
+    @property
+    def interior_item(self) -> cso.Item | None:
+        """The item contained inside this item, e.g. for gift-wrapped items."""
+        return self._cso.interior_item
+
+    @property
+    def equipped_state(self) -> list[cso.ItemEquipped]:
+        """The mercenaries and slots this item is equipped to."""
+        return self._cso.equipped_state
+
     @property
     def quality(self) -> ItemQuality | None:
         """The item's quality."""
@@ -136,7 +241,7 @@ class BackpackItem(Item):
         """Unwrap this item."""
         await self._state.ws.send_gc_message(struct_messages.UnwrapItemRequest(gift_id=self.id))
 
-    async def equip(self, mercenary: Mercenary, slot: ItemSlot) -> None:
+    async def equip(self, mercenary: Mercenary, slot: ItemSlot, *, timeout: Optional[float] = 30) -> None:
         """Equip this item to a mercenary.
 
         Parameters
@@ -145,25 +250,38 @@ class BackpackItem(Item):
             The mercenary to equip the item to.
         slot
             The item slot to equip the item to.
+        timeout
+            How long to wait for the GC to confirm the change before raising :exc:`asyncio.TimeoutError`.
         """
         if slot >= ItemSlot.Misc:
             raise ValueError("cannot use enums that aren't real item slots")
-        msg = GCMsgProto(Language.AdjustItemEquippedState, item_id=self.id, new_class=mercenary, new_slot=slot)
-        await self._state.ws.send_gc_message(msg)
+        msg = base.AdjustItemEquippedState(item_id=self.id, new_class=mercenary, new_slot=slot)
+        await self._state.send_and_wait_for_item_updates(msg, (self.id,), timeout)
 
-    async def set_position(self, position: int) -> None:
+    async def set_position(self, position: int, *, timeout: Optional[float] = 30) -> None:
         """Set the position for this item.
 
         Parameters
         ----------
         position
-            The position to set the item to. This is 0 indexed.
+            The position to set the item to. This is 1 indexed, like :attr:`position`.
+        timeout
+            How long to wait for the GC to confirm the change before raising :exc:`asyncio.TimeoutError`.
         """
-        await self._state.backpack.set_positions([(self, position)])
+        await self._state.backpack.set_positions([(self, position)], timeout=timeout)
 
-    async def set_style(self, style: int) -> None:
-        """Set the style for this item."""
-        await self._state.ws.send_gc_message(base.AdjustItemEquippedState(item_id=self.id, style=style))
+    async def set_style(self, style: int, *, timeout: Optional[float] = 30) -> None:
+        """Set the style for this item.
+
+        Parameters
+        ----------
+        style
+            The style to set the item to.
+        timeout
+            How long to wait for the GC to confirm the change before raising :exc:`asyncio.TimeoutError`.
+        """
+        msg = struct_messages.SetItemStyleRequest(item_id=self.id, style=style)
+        await self._state.send_and_wait_for_item_updates(msg, (self.id,), timeout)
 
     async def send_to(self, user: User) -> None:
         """Send this gift-wrapped item to another user.
@@ -179,8 +297,11 @@ class BackpackItem(Item):
 
     def is_australium(self) -> bool:
         """Whether or not the item is australium."""
+        if hasattr(self, "_cso"):
+            return any(attribute.def_index == AUSTRALIUM for attribute in self.attribute)
         return "Australium" in self.name and self.name != "Australium Gold"
 
+    @cached_per_description
     def is_craftable(self) -> bool:
         """Whether or not the item is craftable."""
         return all(description.get("value") != "( Not Usable in Crafting )" for description in self.descriptions)
@@ -192,16 +313,37 @@ class BackpackItem(Item):
     @property
     def wear(self) -> Optional[WearLevel]:
         """The item's wear level."""
+        if hasattr(self, "_cso"):
+            for attribute in self.attribute:
+                if attribute.def_index == WEAR:
+                    return wear_from_attribute(raw_attributes((attribute,))[WEAR])
+            return None
         wear = WEAR_PARSER.findall(self.name)
-        return WearLevel[wear[0]] if wear else None
+        return WearLevel(wear[0]) if wear else None
+
+    @property
+    def market_hash_name(self) -> str:
+        """The item's market hash name. This is generated from the item schema and the item's attributes so it
+        doesn't depend on the web inventory being up to date. Market hash names are always in English, if the schema
+        or an English language table (see :meth:`Client.load_market_language`) isn't available this is the same as
+        :attr:`name`.
+        """
+        item_names = self._state.item_names if hasattr(self, "_cso") else None
+        if item_names is not None:
+            name = item_names.market_name(self.variant)
+            if name is not None:
+                return name
+        return self.name
 
     @property
+    @cached_per_description
     def equipable_by(self) -> list[Mercenary]:
         """The mercenaries the item is equipable."""
         tags = [tag for tag in self.tags if tag.get("category") == "Class"]
         return [Mercenary[mercenary["internal_name"]] for mercenary in tags]
 
     @property
+    @cached_per_description
     def slot(self) -> Optional[ItemSlot]:
         """The item's equip slot."""
         for tag in self.tags:
@@ -222,7 +364,7 @@ class BackpackItem(Item):
         try:
             return self._def_index
         except AttributeError:
-            schema = SCHEMA.get()
+            schema = SCHEMAS.get()
             for def_index, item in schema["items"].items():
                 if item.get("name") == self.name:
                     self._def_index = int(def_index)
@@ -233,60 +375,54 @@ class BackpackItem(Item):
     def def_index(self, value: int) -> None:
         self._def_index = value
 
-    # @property
-    # def unusual_effect(self):
-    #     print()
+    @property
+    def variant(self) -> ItemVariant:
+        """The parts of the item that make up its :attr:`sku`."""
+        try:
+            return self._variant
+        except AttributeError:
+            pass
+        if hasattr(self, "_cso"):
+            attributes = raw_attributes(self.attribute)
+            return ItemVariant.from_attributes(self.def_index, self.quality, attributes, craftable=self.is_craftable())
+        return ItemVariant(
+            self.def_index, self.quality, self.is_craftable(), self.is_australium(), wear=self.wear  # type: ignore
+        )
 
     @property
     def sku(self) -> str:
         """The item's SKU."""
-        parts = [self.def_index, ";", self.quality.value]
-
-        # if self.unusual:
-        #     parts.append(f";u{self.unusual.value}")
-
-        if self.is_australium():
-            parts.append(";australium")
-
-        if not self.is_craftable():
-            parts.append(";uncraftable")
-
-        if self.wear:
-            parts.append(f";w{self.wear.value}")  # TODO check
-
-        # if self.texture:
-        #     parts.append(f";pk{self.texture}")
-        #
-        # if self.elevated:
-        #     parts.append(";strange")
-        #
-        # if self.killstreak:
-        #     parts.append(f";kt-{self.killstreak}")
-        #
-        # if self.defindex:
-        #     parts.append(f";td-{self.targetDefindex}")
-        #
-        # if self.festivized:
-        #     parts.append(";festive")
-        #
-        # if self.craft_number:
-        #     parts.append(f";n{self.selfNumber.value}")
-        #
-        # if self.crate_number:
-        #     parts.append(f";c{self.selfNumber.value}")
-
-        return "".join(parts)
+        return self.variant.sku
 
     @classmethod
-    def from_sku(cls) -> BackpackItem | None:
-        """Construct a :class:`BackPackItem` from a sku"""
+    def from_sku(cls, sku: str, item_names: ItemNames) -> BackpackItem | None:
+        """Construct a :class:`BackpackItem` from a SKU. ``None`` if the SKU isn't valid or isn't in the schema.
+
+        Parameters
+        ----------
+        sku
+            The item's SKU.
+        item_names
+            The names to use for the item, from :attr:`Client.item_names`.
+        """
+        try:
+            variant = ItemVariant.from_sku(sku)
+        except ValueError:
+            return None
+        # without an English table there's no market hash name, but the item can still be named in the client's language
+        name = item_names.market_hash_name(sku) or item_names.name(variant.def_index)
+        if name is None:
+            return None
         self = cls.__new__(cls)
-        self.def_index = ...
+        self._variant = variant  # keeps everything in the SKU, the name and descriptions can't hold all of it
+        self.def_index = variant.def_index
+        self.quality = variant.quality
+        self.name = self.display_name = name
+        self.descriptions = [] if variant.craftable else [{"value": "( Not Usable in Crafting )"}]
+        self.tags = []
         return self
 
     # TODO:
-    # - festiveized
-    # - effect
     # - to_listing?
     # - from_listing?
 
@@ -294,26 +430,409 @@ class BackpackItem(Item):
 class Backpack(BaseInventory[BackpackItem]):
     """A class to represent the client's backpack."""
 
-    __slots__ = ()
+    __slots__ = (
+        "_assets",
+        "_descriptions",
+        "_items_by_id",
+        "_indexes",
+        "_index_keys",
+        "_has_sku_index",
+        "_slots",
+        "_free_slots",
+        "_item_positions",
+    )
+    _state: GCState
+
+    def _update(self, data: InventoryDict) -> None:
+        # descriptions are shared between every item with the same class and instance id, so only one immutable copy
+        # of each is kept (including between updates) along with a cache for the values derived from it
+        old_descriptions: dict[tuple[str, str], tuple[dict[str, Any], dict[str, Any]]] = getattr(
+            self, "_descriptions", {}
+        )
+        descriptions: dict[tuple[str, str], tuple[dict[str, Any], dict[str, Any]]] = {}
+        for description in data.get("descriptions", ()):
+            key = (description["classid"], description["instanceid"])
+            if key not in descriptions:
+                descriptions[key] = old_descriptions.get(key) or (
+                    {name: tuple(value) if isinstance(value, list) else value for name, value in description.items()},
+                    {},
+                )
+
+        old_items: dict[int, BackpackItem] = getattr(self, "_items_by_id", {})
+        items: list[BackpackItem] = []
+        for asset in data.get("assets", ()):
+            try:
+                description, cache = descriptions[asset["classid"], asset["instanceid"]]
+            except KeyError:
+                items.append(Asset(self._state, data=asset, owner=self.owner))  # type: ignore
+                continue
+            item = BackpackItem(self._state, data=description | asset, owner=self.owner)  # type: ignore
+            item._description_cache = cache
+            old_item = old_items.get(item.id)
+            if old_item is not None and hasattr(old_item, "_cso"):  # the web data doesn't have anything from the GC
+                merge_cso_item(item, old_item._cso)
+                item.position = getattr(old_item, "position", 0)
+            items.append(item)
+
+        self.items = items
+        self._descriptions = descriptions
+        self._assets: list[dict[str, Any]] = data.get("assets", [])  # kept around for save, the descriptions are above
+        self._build_indexes()
+
+    # secondary indexes, these are kept up to date by the GCState's SO handlers
+
+    def _build_indexes(self) -> None:
+        self._items_by_id: dict[int, BackpackItem] = {}
+        self._indexes: dict[str, dict[Any, dict[int, BackpackItem]]] = {name: {} for name in INDEXES}
+        self._index_keys: dict[int, tuple[Any, ...]] = {}
+        self._has_sku_index = False  # built the first time it's queried, see _build_sku_index
+        # position - 1 -> the items there and a bitmap with bit position - 1 set if that position is free. More than one
+        # item can be at a position while the updates for a swap are being applied
+        self._slots: list[dict[int, BackpackItem]] = [{} for _ in range(self._state.backpack_slots or 0)]
+        self._free_slots = (1 << len(self._slots)) - 1
+        self._item_positions: dict[int, int] = {}
+        for item in self.items:
+            self._index_item(item)
+
+    def _resize(self, backpack_slots: int) -> None:
+        if backpack_slots != len(self._slots):
+            self._build_indexes()
+
+    def _index_item(self, item: BackpackItem) -> None:
+        self._items_by_id[item.id] = item
+        if not isinstance(item, BackpackItem):
+            return
+
+        keys = (
+            getattr(item, "_def_index", None),
+            getattr(item, "_quality", None),
+            self._item_sku(item) if self._has_sku_index else None,
+            item.is_tradable(),
+            item.is_craftable(),
+        )
+        self._index_keys[item.id] = keys
+        for index, key in zip(self._indexes.values(), keys):
+            if key is not None:
+                index.setdefault(key, {})[item.id] = item
+
+        position = getattr(item, "position", 0)  # 0 is a new item that hasn't been placed yet
+        if 0 < position <= len(self._slots):
+            self._slots[position - 1][item.id] = item
+            self._free_slots &= ~(1 << (position - 1))
+            self._item_positions[item.id] = position
+
+    def _unindex_item(self, item: BackpackItem) -> None:
+        self._items_by_id.pop(item.id, None)
+        position = self._item_positions.pop(item.id, None)
+        if position is not None:
+            occupants = self._slots[position - 1]
+            occupants.pop(item.id, None)
+            if not occupants:
+                self._free_slots |= 1 << (position - 1)
+
+        keys = self._index_keys.pop(item.id, None)
+        if keys is None:
+            return
+
+        for index, key in zip(self._indexes.values(), keys):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(item.id, None)
+                if not bucket:
+                    del index[key]
+
+    @staticmethod
+    def _item_sku(item: BackpackItem) -> Optional[str]:
+        if not hasattr(item, "_def_index"):  # finding it would mean scanning the schema for the item's name
+            return None
+        try:
+            return item.sku
+        except Exception:  # the schema isn't available yet
+            return None
+
+    def _build_sku_index(self) -> None:
+        # SKUs need every item's attributes decoded, so they're only worked out once something looks one up
+        index = self._indexes["sku"]
+        for item_id, keys in self._index_keys.items():
+            item = self._items_by_id[item_id]
+            sku = self._item_sku(item)
+            if sku is not None:
+                self._index_keys[item_id] = (*keys[:2], sku, *keys[3:])
+                index.setdefault(sku, {})[item_id] = item
+        self._has_sku_index = True
+
+    def _remove_item(self, item: BackpackItem) -> None:
+        self.items.remove(item)  # type: ignore
+        self._unindex_item(item)
+
+    def get_item(self, id: int) -> Optional[BackpackItem]:
+        """Get an item from this backpack by its id.
+
+        Parameters
+        ----------
+        id
+            The id of the item to get.
+        """
+        return self._items_by_id.get(id)
+
+    def item_at(self, position: int) -> Optional[BackpackItem]:
+        """Get the item at a position in this backpack.
 
-    async def set_positions(self, items_and_positions: Iterable[tuple[BackpackItem, int]]) -> None:
+        Parameters
+        ----------
+        position
+            The position to look at, this uses the same indexing as :attr:`BackpackItem.position`.
+        """
+        if not 0 < position <= len(self._slots):
+            return None
+        return next(iter(self._slots[position - 1].values()), None)
+
+    def ordered_items(self) -> list[Optional[BackpackItem]]:
+        """The items in this backpack in position order, with ``None`` for any empty positions."""
+        return [next(iter(occupants.values()), None) for occupants in self._slots]
+
+    @property
+    def free_slots(self) -> int:
+        """The number of items that can still be added to this backpack.
+
+        Items that haven't been placed yet still take up a slot.
+        """
+        return max(len(self._slots) - len(self._items_by_id), 0)
+
+    def is_full(self) -> bool:
+        """Whether or not this backpack has no free slots left."""
+        return self.free_slots == 0
+
+    def first_free_slot(self) -> Optional[int]:
+        """The first position in this backpack with no item in it, ``None`` if every position is taken."""
+        free_slots = self._free_slots
+        return (free_slots & -free_slots).bit_length() or None
+
+    def _matching(
+        self,
+        def_index: Optional[int],
+        quality: Optional[ItemQuality],
+        sku: Optional[str],
+        tradable: Optional[bool],
+        craftable: Optional[bool],
+    ) -> Optional[list[dict[int, BackpackItem]]]:
+        if sku is not None and not self._has_sku_index:
+            self._build_sku_index()
+        values = (def_index, quality, sku, tradable, craftable)
+        buckets = [self._indexes[name].get(value, {}) for name, value in zip(INDEXES, values) if value is not None]
+        return buckets or None
+
+    def query(
+        self,
+        *,
+        def_index: Optional[int] = None,
+        quality: Optional[ItemQuality] = None,
+        sku: Optional[str] = None,
+        tradable: Optional[bool] = None,
+        craftable: Optional[bool] = None,
+    ) -> list[BackpackItem]:
+        """Get the items matching all of the passed criteria, without scanning the whole backpack.
+
+        Parameters
+        ----------
+        def_index
+            The def index to look for.
+        quality
+            The quality to look for.
+        sku
+            The SKU to look for.
+        tradable
+            Whether the items should be tradable.
+        craftable
+            Whether the items should be craftable.
+        """
+        buckets = self._matching(def_index, quality, sku, tradable, craftable)
+        if buckets is None:
+            return [item for item in self.items if isinstance(item, BackpackItem)]
+
+        smallest = min(buckets, key=len)
+        buckets.remove(smallest)
+        return [item for item_id, item in smallest.items() if all(item_id in bucket for bucket in buckets)]
+
+    def count(
+        self,
+        *,
+        def_index: Optional[int] = None,
+        quality: Optional[ItemQuality] = None,
+        sku: Optional[str] = None,
+        tradable: Optional[bool] = None,
+        craftable: Optional[bool] = None,
+    ) -> int:
+        """Count the items matching all of the passed criteria. This is constant time for a single criterion.
+
+        Parameters are the same as :meth:`query`.
+        """
+        buckets = self._matching(def_index, quality, sku, tradable, craftable)
+        if buckets is not None and len(buckets) == 1:
+            return len(buckets[0])
+        return len(self.query(def_index=def_index, quality=quality, sku=sku, tradable=tradable, craftable=craftable))
+
+    def save(self, file: os.PathLike[str], *, descriptions: bool = True) -> None:
+        """Save a snapshot of this backpack to ``file`` to be loaded with :meth:`Client.load_backpack`.
+
+        This blocks whilst the snapshot is written, see :meth:`Client.save_backpack` for an asynchronous version.
+
+        Parameters
+        ----------
+        file
+            The file to write the snapshot to.
+        descriptions
+            Whether to include the items' web descriptions. This makes the snapshot considerably larger but means
+            loading it doesn't require fetching the inventory.
+        """
+        write_snapshot(file, self._snapshot(descriptions))
+
+    def _snapshot(self, descriptions: bool) -> dict[str, Any]:
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "owner": self.owner.id64,
+            "so_version": self._state.so_version,
+            "backpack_slots": self._state.backpack_slots,
+            "is_premium": self._state._is_premium,
+            "items": [
+                [item.id, item.position, base64.b64encode(item._cso._data).decode()]
+                for item in self.items
+                if hasattr(item, "_cso")
+            ],
+            "inventory": (
+                {
+                    "assets": self._assets,
+                    "descriptions": [description for description, _ in self._descriptions.values()],
+                }
+                if descriptions
+                else None
+            ),
+        }
+
+    async def set_positions(
+        self, items_and_positions: Iterable[tuple[BackpackItem, int]], *, timeout: Optional[float] = 30
+    ) -> None:
         """Set the positions of items in the inventory.
 
+        This waits until the GC has sent back the updated positions and they have been applied to this backpack.
+
         Parameters
         ----------
         items_and_positions
-            A list of (item, position) pairs to set the positions for. This is 0 indexed.
+            A list of (item, position) pairs to set the positions for. Positions are 1 indexed, like
+            :attr:`BackpackItem.position`.
+        timeout
+            How long to wait for the GC to confirm the changes before raising :exc:`asyncio.TimeoutError`.
         """
-        await self._state.ws.send_gc_message(base.SetItemPositions(
-            item_positions=[base.SetItemPositionsItemPosition(item_id=item.id, position=position) for item, position in items_and_positions],
-        ))
-
-    async def sort(self, type: BackpackSortType) -> None:
+        # the GC doesn't send an update for items that haven't moved so there's no point sending them
+        moved = [(item, position) for item, position in items_and_positions if item.position != position]
+        if not moved:
+            return
+
+        msg = base.SetItemPositions(
+            item_positions=[
+                base.SetItemPositionsItemPosition(item_id=item.id, position=position) for item, position in moved
+            ],
+        )
+        await self._state.send_and_wait_for_item_updates(msg, (item.id for item, _ in moved), timeout)
+
+    async def sort(self, type: BackpackSortType, *, timeout: float = 5) -> None:
         """Sort this inventory.
 
+        This waits until the GC has sent back the sorted positions and they have been applied to this backpack. The
+        GC doesn't send anything back if the backpack is already sorted, so if nothing is sent back within
+        ``timeout`` seconds it's assumed that it was.
+
         Parameters
         ----------
         type
             The sort type to sort by, only types visible in game are usable.
+        timeout
+            How long to wait for the GC to send back the sorted positions.
+        """
+        try:
+            await self._state.send_and_wait_for_backpack_update(base.SortItems(sort_type=type), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def plan_positions(self, key: SortKey, *, reverse: bool = False, start: int = 1) -> list[tuple[BackpackItem, int]]:
+        """Work out the position changes needed to lay this backpack out in the order given by ``key``.
+
+        Items that compare equal under ``key`` are interchangeable, so any of them already sitting in their group's
+        range of positions are left where they are. Only the items that actually need to move are returned.
+
+        Parameters
+        ----------
+        key
+            Either a :class:`BackpackSortType` or a function to call on each item to get the value to sort by.
+        reverse
+            Whether to reverse the ordering.
+        start
+            The position to place the first item at, this uses the same indexing as :attr:`BackpackItem.position`.
+
+        Returns
+        -------
+        The (item, position) pairs to pass to :meth:`set_positions`.
+        """
+        sort_key = SORT_KEYS[key] if isinstance(key, BackpackSortType) else key
+        # assets without a description don't have a position
+        items = [item for item in self.items if isinstance(item, BackpackItem)]
+        keyed = sorted(((sort_key(item), item) for item in items), key=itemgetter(0), reverse=reverse)
+
+        moves: list[tuple[BackpackItem, int]] = []
+        position = start
+        for _, group in groupby(keyed, key=itemgetter(0)):
+            items = [item for _, item in group]
+            positions = range(position, position + len(items))
+            position += len(items)
+
+            taken = set[int]()
+            to_move: list[BackpackItem] = []
+            for item in items:
+                if item.position in positions and item.position not in taken:
+                    taken.add(item.position)
+                else:
+                    to_move.append(item)
+
+            moves += zip(to_move, (free for free in positions if free not in taken))
+
+        return moves
+
+    async def arrange(
+        self, key: SortKey, *, reverse: bool = False, start: int = 1, timeout: Optional[float] = 30
+    ) -> list[tuple[BackpackItem, int]]:
+        """Lay this backpack out in the order given by ``key``, only moving the items that need to be moved.
+
+        Unlike :meth:`sort` this works with any ordering and sends a single :meth:`set_positions` call containing the
+        minimal set of changes.
+
+        Parameters
+        ----------
+        key
+            Either a :class:`BackpackSortType` or a function to call on each item to get the value to sort by.
+        reverse
+            Whether to reverse the ordering.
+        start
+            The position to place the first item at, this uses the same indexing as :attr:`BackpackItem.position`.
+        timeout
+            How long to wait for the GC to confirm the changes before raising :exc:`asyncio.TimeoutError`.
+
+        Returns
+        -------
+        The (item, position) pairs that were moved.
         """
-        await self._state.ws.send_gc_message(base.SortItems(sort_type=type))
+        moves = self.plan_positions(key, reverse=reverse, start=start)
+        await self.set_positions(moves, timeout=timeout)
+        return moves
+
+
+SortKey = Union[BackpackSortType, Callable[[BackpackItem], Any]]
+SORT_KEYS: dict[BackpackSortType, Callable[[BackpackItem], Any]] = {
+    BackpackSortType.Name: lambda item: item.name or "",
+    BackpackSortType.Defindex: lambda item: item.def_index,
+    BackpackSortType.Rarity: lambda item: item.quality or 0,
+    BackpackSortType.Type: lambda item: item.type or "",
+    BackpackSortType.Date: lambda item: item.id,  # ids are handed out sequentially
+    BackpackSortType.Class: lambda item: [mercenary.value for mercenary in item.equipable_by],
+    BackpackSortType.Slot: lambda item: item.slot.value if item.slot is not None else -1,
+}
@@ -8,16 +8,15 @@ from typing import TYPE_CHECKING, Any, Callable, Final, Iterable, Optional, over
 
 from typing_extensions import Literal
 
-from ..._const import VDF_LOADS
+from ... import utils
 from ...app import TF2, App
 from ...ext import commands
 from ...gateway import Msgs
-from ...protobufs import GCMsg
 from ...user import User
 from .._gc import Client as Client_
 from .._gc.client import ClientUser as ClientUser_
-from .enums import Language
-from .protobufs.struct_messages import CraftResponse
+from . import converters as converters, localization  # converters registers the item converters for Bot
+from .protobufs.struct_messages import CraftRequest, CraftResponse
 from .state import GCState
 
 if TYPE_CHECKING:
@@ -29,6 +28,7 @@ if TYPE_CHECKING:
     from ...trade import Inventory, TradeOffer
     from ..commands import Context
     from .backpack import Backpack, BackpackItem, Schema
+    from .schema import ItemNames, SchemaDiff
 
 __all__ = (
     "Client",
@@ -49,6 +49,24 @@ class TF2ClientUser(ClientUser_):
 
 
 class Client(Client_):
+    """A :class:`steam.Client` that plays TF2 and connects to its GC. As well as the base client's options, it takes:
+
+    Parameters
+    ----------
+    language
+        A language file to load, e.g. ``tf/resource/tf_english.txt``, see :meth:`load_language`.
+    coalesce_item_events
+        Whether to also dispatch the batched item events, e.g. :meth:`on_items_receive`. Defaults to ``False``.
+    item_event_window
+        How many seconds to collect items for before dispatching a batched item event. Defaults to ``0``, one GC
+        message.
+    event_limits
+        A mapping of event names to the :class:`EventLimit` to run their handlers with.
+    restart_threshold
+        How many reconciliations in a row can fail to find items the GC sent us in the web inventory before TF2 is
+        restarted. Defaults to ``3``.
+    """
+
     _APP: Final = TF2  # type: ignore
     _ClientUserCls = TF2ClientUser
     user: TF2ClientUser
@@ -60,11 +78,25 @@ class Client(Client_):
     def _get_gc_message(self) -> Any:
         return False  # for now this isn't required
 
+    def _schedule_event(self, coro: Callable[..., Any], event_name: str, *args: Any, **kwargs: Any) -> asyncio.Task:
+        task = super()._schedule_event(coro, event_name, *args, **kwargs)
+        if self._connection._event_tasks is not None:  # let the event's limiter wait for its handlers
+            self._connection._event_tasks.append(task)
+        return task
+
     @property
     def schema(self) -> Schema:
         """TF2's item schema. ``None`` if the user isn't ready."""
         return self._connection.schema
 
+    @property
+    def item_names(self) -> Optional[ItemNames]:
+        """An index between item def indices and their names, localized if a language has been set with
+        :meth:`set_language` or :meth:`load_language`. Market hash names are generated from an English table, see
+        :meth:`load_market_language`. ``None`` if the schema hasn't been received yet.
+        """
+        return self._connection.item_names
+
     @property
     def backpack_slots(self) -> int:
         """The client's number of backpack slots."""
@@ -77,10 +109,77 @@ class Client(Client_):
     def set_language(self, file: os.PathLike[str]) -> None:
         """Set the localization files for your bot.
 
-        This isn't necessary in most situations.
+        This isn't necessary in most situations. Parsing the file blocks, see :meth:`load_language` for an
+        asynchronous version.
+        """
+        self._connection.language = localization.load(Path(file).resolve())
+
+    async def load_language(self, file: os.PathLike[str]) -> None:
+        """|coro|
+        Set the localization files for your bot without blocking the event loop.
+
+        The parsed table is shared with any other client in the process that loads the same file and cached on disk,
+        so only the first start after the file changes has to parse it.
+
+        Parameters
+        ----------
+        file
+            The language file, e.g. ``tf/resource/tf_english.txt``.
+        """
+        language = await utils.to_thread(localization.load, Path(file).resolve())
+        await self._connection.load_language(language)
+
+    async def load_market_language(self, file: os.PathLike[str]) -> None:
+        """|coro|
+        Load TF2's English language file to generate market hash names and convert them to and from SKUs with.
+
+        Market hash names are always in English, so this is only necessary if the file loaded with
+        :meth:`load_language` is in another language. Without an English table :attr:`BackpackItem.market_hash_name`
+        falls back to the item's name from the web inventory and :attr:`item_names` can't convert SKUs.
+
+        Parameters
+        ----------
+        file
+            The English language file, ``tf/resource/tf_english.txt``.
+        """
+        language = await utils.to_thread(localization.load, Path(file).resolve())
+        await self._connection.load_language(language, market=True)
+
+    async def save_backpack(self, file: os.PathLike[str], *, descriptions: bool = True) -> None:
+        """|coro|
+        Save a snapshot of the backpack to ``file`` without blocking the event loop, see :meth:`Backpack.save`.
+
+        Parameters
+        ----------
+        file
+            The file to write the snapshot to.
+        descriptions
+            Whether to include the items' web descriptions. This makes the snapshot considerably larger but means
+            loading it doesn't require fetching the inventory.
+        """
+        await self._connection.save_backpack(file, descriptions)
+
+    async def load_backpack(self, file: os.PathLike[str]) -> Backpack:
+        """|coro|
+        Load a backpack snapshot saved with :meth:`Backpack.save` so that it can be used straight away, e.g. from
+        :meth:`on_ready`.
+
+        When the GC sends the SO cache the backpack is brought up to date in the background, fetching it again is
+        only necessary if items were received whilst the client was offline.
+
+        If the GC has already sent the SO cache, the snapshot would be out of date, so the current backpack is
+        returned instead.
+
+        Parameters
+        ----------
+        file
+            The file the snapshot was saved to.
+
+        Returns
+        -------
+        The loaded backpack.
         """
-        file = Path(file).resolve()
-        self._connection.language = VDF_LOADS(file.read_text())
+        return await self._connection.load_backpack(file)
 
     async def craft(self, items: Iterable[BackpackItem], recipe: int = -2) -> Optional[list[BackpackItem]]:
         """|coro|
@@ -99,13 +198,11 @@ class Client(Client_):
         The crafted items, ``None`` if crafting failed.
         """
 
-        def check_gc_msg(msg: GCMsg[Any]) -> bool:
-            if (
-                isinstance(msg.body, CraftResponse) and not msg.body.being_used
-            ):  # craft queue is FIFO, so this works fine
+        def check_gc_msg(msg: Any) -> bool:
+            if isinstance(msg, CraftResponse) and not msg.being_used:  # craft queue is FIFO, so this works fine
                 nonlocal ids
-                msg.body.being_used = True
-                ids = list(msg.body.id_list)
+                msg.being_used = True
+                ids = list(msg.id_list)
                 return True
 
             return False
@@ -118,14 +215,14 @@ class Client(Client_):
         listeners = self._listeners.setdefault("crafting_complete", [])
         listeners.append((future, check_crafting_complete))
 
-        await self.ws.send_gc_message(GCMsg(Language.Craft, recipe=recipe, items=[item.id for item in items]))
+        await self.ws.send_gc_message(CraftRequest(recipe=recipe, items=[item.id for item in items]))
 
         try:
             resp = await self.wait_for("gc_message_receive", check=check_gc_msg, timeout=60)
         except asyncio.TimeoutError:
             recipe_id = -1
         else:
-            recipe_id = resp.body.recipe_id
+            recipe_id = resp.recipe_id
 
         if recipe_id == -1:
             future.cancel()  # cancel the future (it's cleaned from _listeners up by dispatch)
@@ -174,6 +271,17 @@ class Client(Client_):
                 - :attr:`backpack_slots`
             """
 
+        async def on_schema_update(self, diff: tf2.SchemaDiff) -> None:
+            """|coro|
+            Called when the GC sends a new version of the item schema during the session, after :attr:`schema` and
+            :attr:`item_names` have been updated.
+
+            Parameters
+            ----------
+            diff: :class:`tf2.SchemaDiff`
+                The items, attributes, recipes and prefabs that were added, removed or changed.
+            """
+
         async def on_crafting_complete(self, items: list[tf2.BackpackItem]) -> None:
             """|coro|
             Called after a crafting recipe is completed.
@@ -216,6 +324,38 @@ class Client(Client_):
                 The item now.
             """
 
+        async def on_items_receive(self, items: list[tf2.BackpackItem]) -> None:
+            """|coro|
+            Called with every item received in a single GC message, or within ``item_event_window`` seconds if it was
+            passed to the client. This is only called if the client was created with ``coalesce_item_events=True``,
+            :meth:`on_item_receive` is still called for each item.
+
+            Parameters
+            ----------
+            items: list[:class:`tf2.BackpackItem`]
+                The received items.
+            """
+
+        async def on_items_remove(self, items: list[tf2.BackpackItem]) -> None:
+            """|coro|
+            The batched version of :meth:`on_item_remove`, see :meth:`on_items_receive` for when this is called.
+
+            Parameters
+            ----------
+            items: list[:class:`tf2.BackpackItem`]
+                The removed items.
+            """
+
+        async def on_items_update(self, items: list[tf2.BackpackItem]) -> None:
+            """|coro|
+            The batched version of :meth:`on_item_update`, see :meth:`on_items_receive` for when this is called.
+
+            Parameters
+            ----------
+            items: list[:class:`tf2.BackpackItem`]
+                The updated items.
+            """
+
         @overload
         async def wait_for(
             self,
@@ -361,6 +501,30 @@ class Client(Client_):
         ) -> BackpackItem:
             ...
 
+        @overload
+        async def wait_for(
+            self,
+            event: Literal[
+                "items_receive",
+                "items_remove",
+                "items_update",
+            ],
+            *,
+            check: Callable[[list[BackpackItem]], bool] = ...,
+            timeout: Optional[float] = ...,
+        ) -> list[BackpackItem]:
+            ...
+
+        @overload
+        async def wait_for(
+            self,
+            event: Literal["schema_update"],
+            *,
+            check: Callable[[SchemaDiff], bool] = ...,
+            timeout: Optional[float] = ...,
+        ) -> SchemaDiff:
+            ...
+
 
 class Bot(commands.Bot, Client):
     if TYPE_CHECKING:
@@ -539,3 +703,27 @@ class Bot(commands.Bot, Client):
             timeout: Optional[float] = ...,
         ) -> BackpackItem:
             ...
+
+        @overload
+        async def wait_for(
+            self,
+            event: Literal[
+                "items_receive",
+                "items_remove",
+                "items_update",
+            ],
+            *,
+            check: Callable[[list[BackpackItem]], bool] = ...,
+            timeout: Optional[float] = ...,
+        ) -> list[BackpackItem]:
+            ...
+
+        @overload
+        async def wait_for(
+            self,
+            event: Literal["schema_update"],
+            *,
+            check: Callable[[SchemaDiff], bool] = ...,
+            timeout: Optional[float] = ...,
+        ) -> SchemaDiff:
+            ...
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+from ...ext import commands
+from .backpack import BackpackItem
+
+if TYPE_CHECKING:
+    from .schema import ItemMatch
+    from .state import GCState
+
+__all__ = (
+    "DefIndex",
+    "SKU",
+    "BackpackItemConverter",
+    "DefIndexConverter",
+    "SKUConverter",
+)
+
+SKU_RE = re.compile(r"\d+;\d+(;[\w-]+)*")
+
+
+class DefIndex(int):
+    """An item def index. Type-hint a command parameter as this to convert an item name or a def index to it."""
+
+
+class SKU(str):
+    """An item SKU. Type-hint a command parameter as this to convert an item name or a SKU to it."""
+
+
+def best_match(ctx: commands.Context, argument: str) -> ItemMatch:
+    state: GCState = ctx.bot._connection
+    if state.item_names is None:
+        raise commands.BadArgument("The item schema hasn't been received yet")
+    matches = state.item_names.search(argument, limit=1)
+    if not matches or matches[0].score < 0.5:
+        raise commands.BadArgument(f'Item "{argument}" not found')
+    return matches[0]
+
+
+class DefIndexConverter(commands.Converter[DefIndex]):
+    """The converter that is used when the type-hint passed is :class:`DefIndex`.
+
+    If the argument is a number it is used as is, otherwise it is the def index of the best match for the item name.
+    """
+
+    async def convert(self, ctx: commands.Context, argument: str) -> DefIndex:
+        if argument.isdigit():
+            return DefIndex(argument)
+        return DefIndex(best_match(ctx, argument).def_index)
+
+
+class SKUConverter(commands.Converter[SKU]):
+    """The converter that is used when the type-hint passed is :class:`SKU`.
+
+    If the argument is already a SKU it is used as is, otherwise it is the SKU of the best match for the item name
+    including any quality, ``Non-Craftable`` or ``Australium`` prefixes.
+    """
+
+    async def convert(self, ctx: commands.Context, argument: str) -> SKU:
+        if SKU_RE.fullmatch(argument):
+            return SKU(argument)
+        return SKU(best_match(ctx, argument).sku)
+
+
+class BackpackItemConverter(commands.Converter[BackpackItem]):
+    """The converter that is used when the type-hint passed is :class:`BackpackItem`.
+
+    Lookup is in the order of:
+        - Item ID
+        - SKU
+        - Name, which uses the best match's SKU and then its def index and quality
+    """
+
+    async def convert(self, ctx: commands.Context, argument: str) -> BackpackItem:
+        state: GCState = ctx.bot._connection
+        backpack = state.backpack
+        if backpack is None:
+            raise commands.BadArgument("The backpack hasn't been received yet")
+
+        if argument.isdigit():
+            item = backpack.get_item(int(argument))
+            if item is not None:
+                return item
+        if SKU_RE.fullmatch(argument):
+            items = backpack.query(sku=argument)
+        else:
+            match = best_match(ctx, argument)
+            items = backpack.query(sku=match.sku) or backpack.query(def_index=match.def_index, quality=match.quality)
+        if not items:
+            raise commands.BadArgument(f'No item matching "{argument}" in the backpack')
+        return items[0]
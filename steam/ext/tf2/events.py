@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from typing_extensions import Literal
+
+if TYPE_CHECKING:
+    from .state import GCState
+
+__all__ = ("EventLimit",)
+
+log = logging.getLogger(__name__)
+
+
+def default_key(*args: Any) -> Hashable:
+    key = []
+    for arg in args:
+        try:
+            key.append(arg.id)
+        except AttributeError:
+            try:
+                hash(arg)
+            except TypeError:
+                arg = id(arg)
+            key.append(arg)
+    return tuple(key)
+
+
+@dataclass
+class EventLimit:
+    """Limits on how an event's handlers are run, pass a mapping of event names to these as the ``event_limits``
+    keyword argument to :class:`Client`.
+
+    .. code-block:: python3
+
+        bot = tf2.Bot(
+            command_prefix="!",
+            event_limits={
+                "item_update": tf2.EventLimit(concurrency=2, max_queued=500, overflow="coalesce"),
+                "display_notification": tf2.EventLimit(overflow="drop_oldest"),
+            },
+        )
+
+    Attributes
+    ----------
+    concurrency
+        The number of dispatches of the event whose handlers may run at once.
+    max_queued
+        The number of dispatches that can be waiting for their handlers to run.
+    overflow
+        What to do when a dispatch happens and the queue is full:
+
+            - ``"block"`` - the GC message that caused the event isn't processed further until there is space.
+            - ``"drop_oldest"`` - the dispatch that has been waiting the longest is discarded.
+            - ``"coalesce"`` - a dispatch replaces a waiting one with the same :attr:`key` and otherwise acts like
+              ``"drop_oldest"``.
+    key
+        The key to coalesce dispatches by, called with the event's arguments. Defaults to the arguments' ids, so
+        updates for the same item are merged.
+    """
+
+    concurrency: int = 1
+    max_queued: int = 100
+    overflow: Literal["block", "drop_oldest", "coalesce"] = "block"
+    key: Callable[..., Hashable] = field(default=default_key)
+
+    def __post_init__(self) -> None:
+        if self.concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if self.max_queued < 1:
+            raise ValueError("max_queued must be at least 1")
+        if self.overflow not in ("block", "drop_oldest", "coalesce"):
+            raise ValueError(f"unknown overflow policy {self.overflow!r}")
+
+
+class EventLimiter:
+    """Queues the dispatches of an event and runs their handlers with at most ``limit.concurrency`` at once."""
+
+    __slots__ = ("state", "event", "limit", "queue", "counter", "workers", "not_full")
+
+    def __init__(self, state: GCState, event: str, limit: EventLimit):
+        self.state = state
+        self.event = event
+        self.limit = limit
+        self.queue: dict[Hashable, tuple[Any, ...]] = {}  # insertion ordered so this doubles as a FIFO
+        self.counter = itertools.count()
+        self.workers = set[asyncio.Task[None]]()
+        self.not_full = asyncio.Event()
+        self.not_full.set()
+
+    def __repr__(self) -> str:
+        return f"<EventLimiter event={self.event!r} queued={len(self.queue)} running={len(self.workers)}>"
+
+    async def put(self, args: tuple[Any, ...]) -> None:
+        if self.limit.overflow == "block":
+            while len(self.queue) >= self.limit.max_queued:
+                await self.not_full.wait()
+        self.put_nowait(args)
+
+    def put_nowait(self, args: tuple[Any, ...]) -> None:
+        """Queue a dispatch without waiting, ``"block"`` limits are allowed to go over :attr:`EventLimit.max_queued`
+        when called from a context that can't wait.
+        """
+        limit = self.limit
+        key = limit.key(*args) if limit.overflow == "coalesce" else next(self.counter)
+        if key not in self.queue and len(self.queue) >= limit.max_queued and limit.overflow != "block":
+            del self.queue[next(iter(self.queue))]
+            log.debug(f"Dropped the oldest queued {self.event} event")
+        self.queue[key] = args
+        if len(self.queue) >= limit.max_queued:
+            self.not_full.clear()
+
+        while len(self.workers) < min(limit.concurrency, len(self.queue)):
+            self.workers.add(self.state.loop.create_task(self.run()))
+
+    async def run(self) -> None:
+        try:
+            while self.queue:
+                args = self.queue.pop(next(iter(self.queue)))
+                if len(self.queue) < self.limit.max_queued:
+                    self.not_full.set()
+                tasks = self.state._dispatch_now(self.event, *args)
+                if tasks:
+                    await asyncio.wait(tasks)
+        finally:  # discard straight away so a dispatch queued after the loop ends starts a new worker
+            self.workers.discard(asyncio.current_task())  # type: ignore
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import codecs
+import hashlib
+import marshal
+import os
+import re
+import sys
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Optional
+
+from typing_extensions import Self
+
+from ..._const import VDF_LOADS
+
+# the language tables are only ever used to format GC notifications, so every string is compiled into a template up
+# front: control characters are stripped and the text is split around its %placeholder% slots so formatting is a join
+
+__all__ = ("Localization",)
+
+CACHE_FORMAT = 1
+
+
+def user_cache_dir() -> Optional[Path]:
+    """The current user's cache directory for the extension, so other users can't plant tables for us to load.
+    ``None`` if the user doesn't have a home directory.
+    """
+    try:
+        if sys.platform == "win32":
+            base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+        elif sys.platform == "darwin":
+            base = Path.home() / "Library" / "Caches"
+        else:
+            base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    except RuntimeError:  # 3.12+ when the home directory can't be resolved
+        return None
+    if not base.is_absolute():  # before 3.12 "~" is left unexpanded instead
+        return None
+    return base / "steam-ext-tf2"
+
+
+LOADED: dict[str, Localization] = {}  # file hash -> table, shared by every client in the process
+
+CONTROL_CHARACTERS = str.maketrans("", "", "\u0001\u0002")
+PLACEHOLDER = re.compile(r"%(\w+)%")
+
+Template = tuple[str, ...]  # literal, placeholder, literal, ..., literal
+
+
+def compile_template(text: str) -> Template:
+    return tuple(PLACEHOLDER.split(text.translate(CONTROL_CHARACTERS)))
+
+
+class Localization:
+    """A language table from one of TF2's ``resource/tf_<language>.txt`` files.
+
+    Strings are looked up without their leading ``#``.
+    """
+
+    __slots__ = ("language", "templates")
+
+    def __init__(self, language: str, templates: dict[str, Template]):
+        self.language = language
+        self.templates = templates
+
+    def __repr__(self) -> str:
+        return f"<Localization language={self.language!r} strings={len(self.templates)}>"
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.templates
+
+    def __getitem__(self, key: str) -> str:
+        return self.format(key, {})
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    @classmethod
+    def from_vdf(cls, data: Mapping[str, Any]) -> Self:
+        """Compile the table from the parsed VDF of a language file."""
+        lang = data.get("lang", data)
+        tokens: Mapping[str, Any] = lang.get("Tokens", lang)
+        templates: dict[str, Template] = {}
+        for key, value in tokens.items():
+            if isinstance(value, str) and key not in templates:  # the first definition wins like a MultiDict lookup
+                templates[key] = compile_template(value)
+        return cls(lang.get("Language", "English"), templates)
+
+    def format(self, key: str, substitutions: Mapping[str, str]) -> str:
+        """Fill in the string's placeholders from ``substitutions``, placeholders without one are left as they are."""
+        template = self.templates[key]
+        if len(template) == 1:
+            return template[0]
+        parts = list(template)
+        for idx in range(1, len(parts), 2):
+            placeholder = parts[idx]
+            parts[idx] = substitutions.get(placeholder, f"%{placeholder}%")
+        return "".join(parts)
+
+
+def load(file: os.PathLike[str], cache_dir: Optional[os.PathLike[str]] = None, *, cache: bool = True) -> Localization:
+    """Load a language file, reusing the table if the same file has been loaded before in this process or, if
+    ``cache`` is ``True``, by a previous one. Tables are cached in ``cache_dir``, by default the user's cache
+    directory, the disk cache is skipped if there isn't one.
+
+    This blocks so should be run in a thread.
+    """
+    data = Path(file).read_bytes()
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    try:
+        return LOADED[digest]
+    except KeyError:
+        pass
+
+    if cache and cache_dir is None:
+        cache_dir = user_cache_dir()
+    cache_file = Path(cache_dir) / f"{digest}.marshal" if cache and cache_dir is not None else None
+    localization = None
+    if cache_file is not None:
+        try:
+            format, language, templates = marshal.loads(cache_file.read_bytes())
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        else:
+            if format == CACHE_FORMAT:
+                localization = Localization(language, templates)
+
+    if localization is None:
+        text = data.decode("utf-16") if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)) else data.decode()
+        localization = Localization.from_vdf(VDF_LOADS(text))
+        if cache_file is not None:
+            temp = cache_file.with_suffix(f".{os.getpid()}.tmp")  # write then rename so readers never see half
+            try:
+                cache_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+                temp.write_bytes(marshal.dumps((CACHE_FORMAT, localization.language, localization.templates)))
+                temp.replace(cache_file)
+            except OSError:
+                try:
+                    temp.unlink(missing_ok=True)
+                except OSError:
+                    pass
+
+    return LOADED.setdefault(digest, localization)
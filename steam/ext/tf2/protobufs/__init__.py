@@ -1,10 +1,24 @@
-from typing import Final
+from typing import Any, Final
 
 import betterproto
 
 APP_ID: Final = 440
 
 from ....protobufs.msg import GCProtobufMessage
-from . import base as base, sdk as sdk, struct_messages as struct_messages
+from . import base as base, cso as cso, sdk as sdk, struct_messages as struct_messages
 
-[setattr(cls, "_betterproto", betterproto.ProtoClassMetadata(cls)) for cls in GCProtobufMessage.__subclasses__()]
+
+class ProtoClassMetadata:
+    """Creates a message's :class:`betterproto.ProtoClassMetadata` the first time it's used rather than at import.
+
+    Building the metadata resolves every field's type hints, so doing it for every message up front was most of the
+    cost of importing the protobufs, even though only a handful of message types are ever received.
+    """
+
+    def __get__(self, instance: Any, owner: type[betterproto.Message]) -> betterproto.ProtoClassMetadata:
+        metadata = betterproto.ProtoClassMetadata(owner)
+        setattr(owner, "_betterproto", metadata)  # replaces this descriptor, so this only happens once per class
+        return metadata
+
+
+[setattr(cls, "_betterproto", ProtoClassMetadata()) for cls in GCProtobufMessage.__subclasses__()]
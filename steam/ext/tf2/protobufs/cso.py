@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from typing_extensions import Self
+
+# a hand-written decoder for CSOEconItem (base.Item), betterproto's reflective one is far too slow to decode a full
+# backpack every time we receive the SO cache
+
+__all__ = (
+    "ItemAttribute",
+    "ItemEquipped",
+    "Item",
+)
+
+VARINT = 0
+FIXED64 = 1
+LENGTH_DELIMITED = 2
+FIXED32 = 5
+
+
+def read_varint(data: bytes | memoryview, pos: int) -> tuple[int, int]:
+    byte = data[pos]
+    pos += 1
+    if byte < 0x80:
+        return byte, pos
+
+    result = byte & 0x7F
+    shift = 7
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def skip_field(data: bytes | memoryview, pos: int, wire_type: int) -> int:
+    if wire_type == VARINT:
+        return read_varint(data, pos)[1]
+    if wire_type == FIXED64:
+        return pos + 8
+    if wire_type == LENGTH_DELIMITED:
+        length, pos = read_varint(data, pos)
+        return pos + length
+    if wire_type == FIXED32:
+        return pos + 4
+    raise ValueError(f"unsupported wire type {wire_type}")
+
+
+class ItemAttribute(NamedTuple):
+    def_index: int = 0
+    value: int = 0
+    value_bytes: bytes = b""
+
+
+class ItemEquipped(NamedTuple):
+    new_class: int = 0
+    new_slot: int = 0
+
+
+def parse_attribute(data: bytes | memoryview, pos: int, end: int) -> ItemAttribute:
+    def_index = value = 0
+    value_bytes = b""
+    while pos < end:
+        key, pos = read_varint(data, pos)
+        field, wire_type = key >> 3, key & 7
+        if field == 1 and wire_type == VARINT:
+            def_index, pos = read_varint(data, pos)
+        elif field == 2 and wire_type == VARINT:
+            value, pos = read_varint(data, pos)
+        elif field == 3 and wire_type == LENGTH_DELIMITED:
+            length, pos = read_varint(data, pos)
+            value_bytes = bytes(data[pos : pos + length])
+            pos += length
+        else:
+            pos = skip_field(data, pos, wire_type)
+    return ItemAttribute(def_index, value, value_bytes)
+
+
+def parse_equipped(data: bytes | memoryview, pos: int, end: int) -> ItemEquipped:
+    new_class = new_slot = 0
+    while pos < end:
+        key, pos = read_varint(data, pos)
+        field, wire_type = key >> 3, key & 7
+        if field == 1 and wire_type == VARINT:
+            new_class, pos = read_varint(data, pos)
+        elif field == 2 and wire_type == VARINT:
+            new_slot, pos = read_varint(data, pos)
+        else:
+            pos = skip_field(data, pos, wire_type)
+    return ItemEquipped(new_class, new_slot)
+
+
+VARINT_FIELDS = {
+    1: "id",
+    2: "account_id",
+    3: "inventory",
+    4: "def_index",
+    5: "quantity",
+    6: "level",
+    7: "quality",
+    8: "flags",
+    9: "origin",
+    15: "style",
+    16: "original_id",
+}
+BOOL_FIELDS = {
+    14: "in_use",
+    17: "contains_equipped_state",
+    19: "contains_equipped_state_v2",
+}
+
+
+class Item:
+    """A drop in replacement for decoding :class:`base.Item` that has the same fields.
+
+    :attr:`attribute`, :attr:`interior_item` and :attr:`equipped_state` are only decoded from the raw bytes the first
+    time one of them is accessed.
+    """
+
+    __slots__ = (
+        "id",
+        "account_id",
+        "inventory",
+        "def_index",
+        "quantity",
+        "level",
+        "quality",
+        "flags",
+        "origin",
+        "custom_name",
+        "custom_description",
+        "in_use",
+        "style",
+        "original_id",
+        "contains_equipped_state",
+        "contains_equipped_state_v2",
+        "_data",
+        "_attribute",
+        "_interior_item",
+        "_equipped_state",
+    )
+
+    # only the eagerly decoded fields are annotated
+    id: int
+    account_id: int
+    inventory: int
+    def_index: int
+    quantity: int
+    level: int
+    quality: int
+    flags: int
+    origin: int
+    custom_name: str
+    custom_description: str
+    in_use: bool
+    style: int
+    original_id: int
+    contains_equipped_state: bool
+    contains_equipped_state_v2: bool
+
+    def __init__(self) -> None:
+        self.id = self.account_id = self.inventory = self.def_index = self.quantity = self.level = 0
+        self.quality = self.flags = self.origin = self.style = self.original_id = 0
+        self.custom_name = self.custom_description = ""
+        self.in_use = self.contains_equipped_state = self.contains_equipped_state_v2 = False
+        self._data = memoryview(b"")
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} id={self.id} def_index={self.def_index} quality={self.quality}>"
+
+    def parse(self, data: bytes | memoryview) -> Self:
+        self._data = data = memoryview(data)
+        pos = 0
+        end = len(data)
+        while pos < end:
+            key, pos = read_varint(data, pos)
+            field, wire_type = key >> 3, key & 7
+            if wire_type == VARINT:
+                value, pos = read_varint(data, pos)
+                try:
+                    setattr(self, VARINT_FIELDS[field], value)
+                except KeyError:
+                    if field in BOOL_FIELDS:
+                        setattr(self, BOOL_FIELDS[field], bool(value))
+            elif wire_type == LENGTH_DELIMITED:
+                length, pos = read_varint(data, pos)
+                field_end = pos + length
+                if field == 10:
+                    self.custom_name = str(data[pos:field_end], "utf-8")
+                elif field == 11:
+                    self.custom_description = str(data[pos:field_end], "utf-8")
+                pos = field_end  # attribute, interior_item and equipped_state are left for _parse_lazy_fields
+            else:
+                pos = skip_field(data, pos, wire_type)
+
+        return self
+
+    def _parse_lazy_fields(self) -> None:
+        data = self._data
+        attribute: list[ItemAttribute] = []
+        equipped_state: list[ItemEquipped] = []
+        interior_item: Item | None = None
+        pos = 0
+        end = len(data)
+        while pos < end:
+            key, pos = read_varint(data, pos)
+            field, wire_type = key >> 3, key & 7
+            if wire_type != LENGTH_DELIMITED:
+                pos = skip_field(data, pos, wire_type)
+                continue
+
+            length, pos = read_varint(data, pos)
+            field_end = pos + length
+            if field == 12:
+                attribute.append(parse_attribute(data, pos, field_end))
+            elif field == 18:
+                equipped_state.append(parse_equipped(data, pos, field_end))
+            elif field == 13:
+                interior_item = Item().parse(data[pos:field_end])
+            pos = field_end
+
+        self._attribute = attribute
+        self._equipped_state = equipped_state
+        self._interior_item = interior_item
+
+    @property
+    def attribute(self) -> list[ItemAttribute]:
+        try:
+            return self._attribute
+        except AttributeError:
+            self._parse_lazy_fields()
+            return self._attribute
+
+    @property
+    def interior_item(self) -> Item | None:
+        try:
+            return self._interior_item
+        except AttributeError:
+            self._parse_lazy_fields()
+            return self._interior_item
+
+    @property
+    def equipped_state(self) -> list[ItemEquipped]:
+        try:
+            return self._equipped_state
+        except AttributeError:
+            self._parse_lazy_fields()
+            return self._equipped_state
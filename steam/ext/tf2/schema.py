@@ -0,0 +1,727 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import struct
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from collections.abc import Awaitable, Callable, Iterable, Iterator, Mapping
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+
+from typing_extensions import Self
+
+from .enums import ItemQuality, WearLevel
+
+if TYPE_CHECKING:
+    from .localization import Localization
+    from .protobufs.cso import ItemAttribute
+    from .types.schema import Schema
+
+__all__ = (
+    "ItemNames",
+    "ItemMatch",
+    "ItemVariant",
+    "SchemaDiff",
+)
+
+QUALITY_PREFIXES = {
+    "normal": ItemQuality.Normal,
+    "genuine": ItemQuality.Genuine,
+    "vintage": ItemQuality.Vintage,
+    "unusual": ItemQuality.Unusual,
+    "unique": ItemQuality.Unique,
+    "community": ItemQuality.Community,
+    "valve": ItemQuality.Valve,
+    "self-made": ItemQuality.SelfMade,
+    "strange": ItemQuality.Strange,
+    "haunted": ItemQuality.Haunted,
+    "collector's": ItemQuality.Collectors,
+    "decorated": ItemQuality.DecoratedWeapon,
+}
+UNCRAFTABLE_PREFIXES = ("non-craftable", "uncraftable")
+
+# attribute def indices used in market names, the values of float attributes are sent as their bits
+UNUSUAL_EFFECT = 134
+WEAR = 725
+PAINT_KIT = 834
+KILLSTREAK_TIER = 2025
+AUSTRALIUM = 2027
+FESTIVIZED = 2053
+
+KILLSTREAK_TIERS = {1: "Killstreak", 2: "Specialized Killstreak", 3: "Professional Killstreak"}
+KILLSTREAK_PREFIXES = {"killstreak": 1, "specialized": 2, "professional": 3}  # the last two are followed by killstreak
+WEARS = list(WearLevel)
+MARKET_QUALITY_PREFIXES = {  # Unique and Decorated Weapon items don't have one
+    quality: prefix.capitalize()
+    for prefix, quality in QUALITY_PREFIXES.items()
+    if quality not in (ItemQuality.Unique, ItemQuality.DecoratedWeapon)
+}
+MARKET_QUALITY_PREFIXES[ItemQuality.SelfMade] = "Self-Made"
+SCHEMA_SECTIONS = ("items", "attributes", "recipes", "prefabs")  # the sections that are diffed on updates
+PAINT_KIT_TOKEN = re.compile(r"9_(\d+)_field \{ field_number: 2 \}")  # the protodef names of paint kits
+
+
+def raw_attributes(attributes: Iterable[ItemAttribute]) -> dict[int, int]:
+    """Get the raw 32 bit values of an item's attributes by their def index."""
+    return {
+        attribute.def_index: (
+            int.from_bytes(attribute.value_bytes, "little") if len(attribute.value_bytes) == 4 else attribute.value
+        )
+        for attribute in attributes
+    }
+
+
+def as_float(value: int) -> float:
+    return struct.unpack("<f", value.to_bytes(4, "little"))[0]
+
+
+def wear_from_attribute(value: int) -> WearLevel:
+    return WEARS[min(max(round(as_float(value) * 5), 1), 5) - 1]  # 0.2 is Factory New up to 1.0 for Battle Scarred
+
+
+def item_field(schema: Schema, item: Mapping[str, Any], field: str) -> Any:
+    """Get ``field`` from an item in the schema, falling back to the prefabs it inherits from."""
+    try:
+        return item[field]
+    except KeyError:
+        pass
+    for prefab_name in item.get("prefab", "").split():
+        prefab = schema["prefabs"].get(prefab_name)
+        if prefab is not None:
+            value = item_field(schema, prefab, field)
+            if value is not None:
+                return value
+    return None
+
+
+def trigrams(text: str) -> set[str]:
+    text = f"  {text} "  # padded so short words and the starts of words still have trigrams
+    return {text[idx : idx + 3] for idx in range(len(text) - 2)}
+
+
+class ItemMatch(NamedTuple):
+    """A result from :meth:`ItemNames.search`."""
+
+    def_index: int
+    name: str
+    score: float  # 1 for an exact match down to 0
+    quality: ItemQuality = ItemQuality.Unique
+    craftable: bool = True
+    australium: bool = False
+
+    @property
+    def sku(self) -> str:
+        """The SKU of the variant of the item that was searched for."""
+        return ItemVariant(self.def_index, self.quality, self.craftable, self.australium).sku
+
+
+class ItemVariant(NamedTuple):
+    """The parts of an item that make up its SKU."""
+
+    def_index: int
+    quality: ItemQuality
+    craftable: bool = True
+    australium: bool = False
+    festivized: bool = False
+    killstreak_tier: int = 0
+    paint_kit: Optional[int] = None
+    wear: Optional[WearLevel] = None
+    effect: Optional[int] = None  # not part of market hash names
+
+    @classmethod
+    def from_attributes(
+        cls, def_index: int, quality: ItemQuality, attributes: Mapping[int, int], *, craftable: bool = True
+    ) -> Self:
+        """Get the variant of an item from its raw attribute values, see :func:`raw_attributes`."""
+        return cls(
+            def_index,
+            quality,
+            craftable,
+            AUSTRALIUM in attributes,
+            FESTIVIZED in attributes,
+            round(as_float(attributes[KILLSTREAK_TIER])) if KILLSTREAK_TIER in attributes else 0,
+            attributes.get(PAINT_KIT),
+            wear_from_attribute(attributes[WEAR]) if WEAR in attributes else None,
+            round(as_float(attributes[UNUSUAL_EFFECT])) if UNUSUAL_EFFECT in attributes else None,
+        )
+
+    @classmethod
+    def from_sku(cls, sku: str) -> Self:
+        """Parse a SKU like ``"205;11;australium;kt-3;festive"``. Parts that don't affect the variant, e.g. crate
+        numbers, are ignored.
+
+        Raises
+        ------
+        ValueError
+            The SKU isn't valid.
+        """
+        def_index, quality, *parts = sku.split(";")
+        variant = cls(int(def_index), ItemQuality.try_value(int(quality)))
+        for part in parts:
+            if part == "australium":
+                variant = variant._replace(australium=True)
+            elif part == "uncraftable":
+                variant = variant._replace(craftable=False)
+            elif part == "festive":
+                variant = variant._replace(festivized=True)
+            elif part.startswith("kt-"):
+                variant = variant._replace(killstreak_tier=int(part[3:]))
+            elif part.startswith("pk"):
+                variant = variant._replace(paint_kit=int(part[2:]))
+            elif part.startswith("w"):
+                wear = int(part[1:])
+                if not 1 <= wear <= len(WEARS):
+                    raise ValueError(f"invalid wear {wear} in SKU {sku!r}, should be between 1 and {len(WEARS)}")
+                variant = variant._replace(wear=WEARS[wear - 1])
+            elif part.startswith("u"):
+                variant = variant._replace(effect=int(part[1:]))
+        return variant
+
+    @property
+    def sku(self) -> str:
+        """The variant's SKU, in the same format as https://github.com/Nicklason/node-tf2-sku."""
+        parts = [str(self.def_index), ";", str(self.quality.value)]
+        if self.effect is not None:
+            parts.append(f";u{self.effect}")
+        if self.australium:
+            parts.append(";australium")
+        if not self.craftable:
+            parts.append(";uncraftable")
+        if self.wear is not None:
+            parts.append(f";w{WEARS.index(self.wear) + 1}")
+        if self.paint_kit is not None:
+            parts.append(f";pk{self.paint_kit}")
+        if self.killstreak_tier:
+            parts.append(f";kt-{self.killstreak_tier}")
+        if self.festivized:
+            parts.append(";festive")
+        return "".join(parts)
+
+
+class SchemaRegistry:
+    """The item schemas shared by every client in the process.
+
+    Clients that receive the same ``item_schema_version`` share one parsed schema, and if they receive it at the same
+    time it is only downloaded once. Only the newest version is kept, the clients still reference any older ones they
+    are using. This can be read from any thread.
+    """
+
+    __slots__ = ("_lock", "_current", "_pending")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # swapped as one reference rather than mutated, so a reader on another thread never pairs a version with
+        # another version's schema
+        self._current: Optional[tuple[int, Schema]] = None
+        self._pending: dict[int, Future[Schema]] = {}
+
+    def __repr__(self) -> str:
+        current = self._current
+        return f"<SchemaRegistry version={current[0] if current is not None else None}>"
+
+    def get(self) -> Schema:
+        """The newest schema.
+
+        Raises
+        ------
+        LookupError
+            No schema has been received yet.
+        """
+        current = self._current
+        if current is None:
+            raise LookupError("No item schema has been received yet")
+        return current[1]
+
+    def set(self, version: int, schema: Schema) -> Schema:
+        """Store ``schema`` if it's the newest schema, returning the instance for ``version`` that should be used.
+
+        A ``version`` of 0 means the GC didn't send one, so the schema is never shared and only becomes the newest if
+        no versioned schema has been stored.
+        """
+        with self._lock:
+            current = self._current
+            if current is not None and version and current[0] == version:
+                return current[1]
+            if current is None or ((version or not current[0]) and version >= current[0]):
+                self._current = (version, schema)
+            return schema
+
+    async def fetch(self, version: int, fetch: Callable[[], Awaitable[Schema]]) -> Schema:
+        """Get the schema for ``version``, calling ``fetch`` to get it unless it's already stored or being fetched.
+
+        If the fetch fails, everyone waiting on it gets its exception. If it's cancelled, they fetch it themselves.
+        """
+        if not version:  # unversioned schemas can't be told apart, so they aren't shared
+            return self.set(version, await fetch())
+
+        while True:
+            with self._lock:
+                current = self._current
+                if current is not None and current[0] == version:
+                    return current[1]
+                future = self._pending.get(version)
+                if future is None:
+                    future = self._pending[version] = Future()
+                    break
+
+            try:  # can be on another thread's event loop, shielded so cancelling a waiter doesn't cancel the fetch
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():  # the waiter itself was cancelled
+                    raise
+
+        try:
+            schema = self.set(version, await fetch())
+        except BaseException as exc:
+            with self._lock:  # removed first so the waiters don't find it again when they retry
+                del self._pending[version]
+            if isinstance(exc, Exception):
+                future.set_exception(exc)
+            else:
+                future.cancel()
+            raise
+        with self._lock:
+            del self._pending[version]
+        future.set_result(schema)
+        return schema
+
+
+SCHEMAS = SchemaRegistry()
+
+
+class SectionDiff(NamedTuple):
+    """The differences between two versions of a section of the schema, keyed like the section."""
+
+    added: dict[str, Any]
+    removed: dict[str, Any]
+    changed: dict[str, tuple[Any, Any]]  # key -> (old, new)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    @classmethod
+    def from_sections(cls, old: Mapping[str, Any], new: Mapping[str, Any]) -> Self:
+        return cls(
+            {key: value for key, value in new.items() if key not in old},
+            {key: value for key, value in old.items() if key not in new},
+            {key: (old[key], value) for key, value in new.items() if key in old and old[key] != value},
+        )
+
+
+class SchemaDiff(NamedTuple):
+    """The changes between two versions of the item schema, see :meth:`Client.on_schema_update`."""
+
+    old_version: int
+    new_version: int
+    items: SectionDiff
+    attributes: SectionDiff
+    recipes: SectionDiff
+    prefabs: SectionDiff
+
+    def __bool__(self) -> bool:
+        return any((self.items, self.attributes, self.recipes, self.prefabs))
+
+    @classmethod
+    def from_schemas(cls, old: Schema, new: Schema, old_version: int = 0, new_version: int = 0) -> Self:
+        """Diff two schemas. This compares every item so should be run in a thread."""
+        return cls(
+            old_version,
+            new_version,
+            *(SectionDiff.from_sections(old.get(section, {}), new.get(section, {})) for section in SCHEMA_SECTIONS),
+        )
+
+
+class ItemNames:
+    """A bidirectional index between item def indices and their localized names.
+
+    Names are looked up case-insensitively. Without a language table loaded the schema's internal names are used,
+    these are usually the English names.
+
+    Market hash names are always in English, so they're built from a separate English table, ``english``, which
+    defaults to ``language`` if that's English. Without one, market hash names and SKUs can't be converted.
+    """
+
+    __slots__ = (
+        "_names",
+        "_def_indices",
+        "_market_names",
+        "_market_def_indices",
+        "_stock",
+        "_sorted_keys",
+        "_trigrams",
+        "_paint_kits",
+        "_paint_kit_ids",
+        "_skus",
+        "_market_hash_names",
+        "_language",
+        "_tokens",
+        "_english",
+        "_english_tokens",
+    )
+
+    def __init__(self, schema: Schema, language: Optional[Localization] = None, english: Optional[Localization] = None):
+        if english is None and language is not None and language.language.casefold() == "english":
+            english = language
+        self._names: dict[int, str] = {}
+        self._def_indices: dict[str, list[int]] = {}
+        self._market_names: dict[int, str] = {}  # only the names from the English table
+        self._market_def_indices: dict[str, list[int]] = {}
+        self._stock = set[int]()
+        self._language = language
+        self._tokens = {key.casefold(): key for key in language.templates} if language is not None else {}
+        self._english = english
+        self._english_tokens = (
+            self._tokens
+            if english is language
+            else {key.casefold(): key for key in english.templates} if english is not None else {}
+        )
+
+        for def_index, item in schema["items"].items():
+            self._add(schema, int(def_index), item)
+        self._build_search_index()
+
+        self._paint_kits: dict[int, str] = {}  # only used in market hash names, so these are in English too
+        if english is not None:
+            for key in english.templates:
+                match = PAINT_KIT_TOKEN.fullmatch(key)
+                if match is not None:
+                    self._paint_kits[int(match[1])] = english[key]
+        self._paint_kit_ids = {name.casefold(): paint_kit for paint_kit, name in self._paint_kits.items()}
+
+        # every combination of the variants of every item would be millions of names, so conversions are done from the
+        # indexes above and remembered instead. A price feed only has a few thousand distinct names
+        self._skus: dict[str, Optional[str]] = {}
+        self._market_hash_names: dict[str, Optional[str]] = {}
+
+    def __repr__(self) -> str:
+        return f"<ItemNames items={len(self._names)}>"
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[tuple[int, str]]:
+        return iter(self._names.items())
+
+    @staticmethod
+    def _translate(table: Optional[Localization], tokens: Mapping[str, str], token: Optional[str]) -> Optional[str]:
+        if table is None or token is None:
+            return None
+        key = tokens.get(token)
+        return table[key] if key is not None else None
+
+    def _add(self, schema: Schema, def_index: int, item: Mapping[str, Any]) -> bool:
+        """Add an item from the schema, returning whether its name is new."""
+        item_name = item_field(schema, item, "item_name")
+        token = item_name[1:].casefold() if item_name and item_name[0] == "#" else None
+        name = self._translate(self._language, self._tokens, token) or item["name"]
+        self._names[def_index] = name
+        market_name = self._translate(self._english, self._english_tokens, token)
+        if market_name is not None:
+            self._market_names[def_index] = market_name
+            self._market_def_indices.setdefault(market_name.casefold(), []).append(def_index)
+        if item.get("baseitem") == "1" or item_field(schema, item, "item_quality") == "normal":
+            self._stock.add(def_index)
+        def_indices = self._def_indices.setdefault(name.casefold(), [])
+        def_indices.append(def_index)
+        return len(def_indices) == 1
+
+    def _remove(self, def_index: int) -> None:
+        name = self._names.pop(def_index, None)
+        if name is None:
+            return
+        self._stock.discard(def_index)
+        market_name = self._market_names.pop(def_index, None)
+        if market_name is not None:
+            market_key = market_name.casefold()
+            market_def_indices = self._market_def_indices[market_key]
+            market_def_indices.remove(def_index)
+            if not market_def_indices:
+                del self._market_def_indices[market_key]
+        key = name.casefold()
+        def_indices = self._def_indices[key]
+        def_indices.remove(def_index)
+        if not def_indices:
+            del self._def_indices[key]
+            self._unindex(key)
+
+    def update(self, schema: Schema, diff: SchemaDiff) -> None:
+        """Apply ``diff`` in place, only the items that were added, removed or changed (including through their
+        prefabs) are re-indexed unless that's a large part of the schema.
+
+        This blocks for a while on large diffs, the client works out what changed in a thread and builds a new
+        instance in one if it's quicker to start again.
+        """
+        def_indices = self._changed_items(schema, diff)
+        if def_indices is None:
+            self._names.clear()
+            self._def_indices.clear()
+            self._market_names.clear()
+            self._market_def_indices.clear()
+            self._stock.clear()
+            for def_index, item in schema["items"].items():
+                self._add(schema, int(def_index), item)
+            self._build_search_index()
+            self._skus.clear()
+            self._market_hash_names.clear()
+        else:
+            self._patch(schema, diff, def_indices)
+
+    def _changed_items(self, schema: Schema, diff: SchemaDiff) -> Optional[set[str]]:
+        """The def indices to re-index for ``diff``, ``None`` if it would be quicker to start again. This doesn't
+        modify anything so it can be run in a thread.
+        """
+        prefabs = {*diff.prefabs.added, *diff.prefabs.removed, *diff.prefabs.changed}
+        while True:  # prefabs can inherit from other prefabs
+            inheriting = {
+                name
+                for name, prefab in schema["prefabs"].items()
+                if not prefabs.isdisjoint(prefab.get("prefab", "").split())
+            }
+            if inheriting <= prefabs:
+                break
+            prefabs |= inheriting
+
+        def_indices = {*diff.items.added, *diff.items.changed}
+        if prefabs:
+            def_indices.update(
+                def_index
+                for def_index, item in schema["items"].items()
+                if not prefabs.isdisjoint(item.get("prefab", "").split())
+            )
+        if len(def_indices) + len(diff.items.removed) > len(self._names) // 4:
+            return None
+        return def_indices
+
+    def _patch(self, schema: Schema, diff: SchemaDiff, def_indices: set[str]) -> None:
+        for def_index in (*diff.items.removed, *def_indices):
+            self._remove(int(def_index))
+        for def_index in def_indices:
+            if self._add(schema, int(def_index), schema["items"][def_index]):
+                self._index(self._names[int(def_index)].casefold())
+
+        self._skus.clear()  # names could have changed
+        self._market_hash_names.clear()
+
+    def name(self, def_index: int) -> Optional[str]:
+        """The localized name of the item with ``def_index``."""
+        return self._names.get(def_index)
+
+    def def_indices(self, name: str) -> list[int]:
+        """Every def index with the localized ``name``, e.g. the stock and upgradeable versions of a weapon."""
+        return list(self._def_indices.get(name.casefold(), ()))
+
+    def def_index(
+        self, name: str, quality: ItemQuality = ItemQuality.Unique, *, variant: bool = False
+    ) -> Optional[int]:
+        """The def index of an item with the localized ``name`` and ``quality``.
+
+        Stock weapons share their names with an upgradeable version, e.g. the Rocket Launcher is 18 and 205, and only
+        the upgradeable one can be anything other than Normal or Unique quality, Killstreak, Australium or
+        Festivized. So if ``quality`` isn't Normal or Unique or ``variant`` is ``True`` (the item has one of those
+        prefixes) the lowest def index that isn't a stock item is returned, otherwise the lowest def index.
+        """
+        return self._pick_def_index(self._def_indices.get(name.casefold()), quality, variant)
+
+    def _pick_def_index(self, def_indices: Optional[list[int]], quality: ItemQuality, variant: bool) -> Optional[int]:
+        if not def_indices:
+            return None
+        if quality in (ItemQuality.Normal, ItemQuality.Unique) and not variant:
+            return min(def_indices)
+        return min(def_indices, key=lambda def_index: (def_index in self._stock, def_index))
+
+    # market hash names
+
+    def market_name(self, variant: ItemVariant) -> Optional[str]:
+        """Generate an item's market hash name from only the schema, e.g.
+        ``"Strange Festivized Professional Killstreak Australium Rocket Launcher"``.
+
+        The unusual effect and craftability aren't part of market hash names so they're ignored. ``None`` if the def
+        index isn't in the schema or there's no English table to name it with.
+        """
+        name = self._market_names.get(variant.def_index)
+        if name is None:
+            return None
+
+        parts: list[str] = []
+        if variant.quality in MARKET_QUALITY_PREFIXES:
+            parts.append(MARKET_QUALITY_PREFIXES[variant.quality])
+        if variant.festivized:
+            parts.append("Festivized")
+        if variant.killstreak_tier in KILLSTREAK_TIERS:
+            parts.append(KILLSTREAK_TIERS[variant.killstreak_tier])
+        if variant.australium:
+            parts.append("Australium")
+        if variant.paint_kit in self._paint_kits:
+            parts.append(self._paint_kits[variant.paint_kit])  # type: ignore
+        parts.append(name)
+        if variant.wear is not None:
+            parts.append(variant.wear.value)
+        return " ".join(parts)
+
+    def parse_market_name(self, market_hash_name: str) -> Optional[ItemVariant]:
+        """The inverse of :meth:`market_name`. ``None`` if the base item's English name isn't in the schema."""
+        name = " ".join(market_hash_name.casefold().split())
+        wear = None
+        for level in WEARS:
+            suffix = f" {level.value.casefold()}"
+            if name.endswith(suffix):
+                wear = level
+                name = name[: -len(suffix)]
+                break
+
+        quality = None
+        festivized = australium = False
+        killstreak_tier = 0
+        while name not in self._market_def_indices:  # only strip prefixes off names that aren't exact, like search
+            prefix, _, rest = name.partition(" ")
+            if not rest:
+                break
+            if prefix in QUALITY_PREFIXES and quality is None:
+                quality = QUALITY_PREFIXES[prefix]
+            elif prefix == "festivized":
+                festivized = True
+            elif prefix in KILLSTREAK_PREFIXES:
+                if prefix != "killstreak":
+                    killstreak, _, rest = rest.partition(" ")
+                    if killstreak != "killstreak" or not rest:
+                        break
+                killstreak_tier = KILLSTREAK_PREFIXES[prefix]
+            elif prefix == "australium":
+                australium = True
+            else:
+                break
+            name = rest
+
+        paint_kit = None
+        if name not in self._market_def_indices:
+            words = name.split(" ")
+            for idx in range(1, len(words)):
+                paint_kit_name, base_name = " ".join(words[:idx]), " ".join(words[idx:])
+                if paint_kit_name in self._paint_kit_ids and base_name in self._market_def_indices:
+                    paint_kit = self._paint_kit_ids[paint_kit_name]
+                    name = base_name
+                    break
+            else:
+                return None
+
+        if quality is None:
+            quality = ItemQuality.DecoratedWeapon if paint_kit is not None else ItemQuality.Unique
+        return ItemVariant(
+            self._pick_def_index(  # type: ignore
+                self._market_def_indices[name], quality, bool(festivized or australium or killstreak_tier)
+            ),
+            quality,
+            australium=australium,
+            festivized=festivized,
+            killstreak_tier=killstreak_tier,
+            paint_kit=paint_kit,
+            wear=wear,
+        )
+
+    def sku(self, market_hash_name: str) -> Optional[str]:
+        """Convert a market hash name to a SKU. ``None`` if the base item's English name isn't in the schema."""
+        try:
+            return self._skus[market_hash_name]
+        except KeyError:
+            variant = self.parse_market_name(market_hash_name)
+            sku = self._skus[market_hash_name] = variant.sku if variant is not None else None
+            return sku
+
+    def market_hash_name(self, sku: str) -> Optional[str]:
+        """Convert a SKU to a market hash name. ``None`` if the SKU isn't valid or its def index isn't in the schema."""
+        try:
+            return self._market_hash_names[sku]
+        except KeyError:
+            try:
+                variant = ItemVariant.from_sku(sku)
+            except (ValueError, IndexError):
+                name = None
+            else:
+                name = self.market_name(variant)
+            self._market_hash_names[sku] = name
+            return name
+
+    # searching
+
+    def _build_search_index(self) -> None:
+        self._sorted_keys = sorted(self._def_indices)
+        self._trigrams: dict[str, list[str]] = {}
+        for key in self._sorted_keys:
+            for trigram in trigrams(key):
+                self._trigrams.setdefault(trigram, []).append(key)
+
+    def _index(self, key: str) -> None:
+        insort(self._sorted_keys, key)
+        for trigram in trigrams(key):
+            self._trigrams.setdefault(trigram, []).append(key)
+
+    def _unindex(self, key: str) -> None:
+        del self._sorted_keys[bisect_left(self._sorted_keys, key)]
+        for trigram in trigrams(key):
+            keys = self._trigrams[trigram]
+            keys.remove(key)
+            if not keys:
+                del self._trigrams[trigram]
+
+    def _search_keys(self, query: str, limit: int) -> list[tuple[float, str]]:
+        if query in self._def_indices:
+            return [(1.0, query)]
+
+        results: dict[str, float] = {}
+        start = bisect_left(self._sorted_keys, query)
+        for key in self._sorted_keys[start : start + limit]:
+            if not key.startswith(query):
+                break
+            results[key] = 0.5 + 0.4 * len(query) / len(key)
+
+        query_trigrams = trigrams(query)
+        common = Counter[str]()
+        for trigram in query_trigrams:
+            common.update(self._trigrams.get(trigram, ()))
+        for key, count in common.most_common(limit * 4):
+            score = 2 * count / (len(query_trigrams) + len(key) + 1) * 0.9  # the dice coefficient
+            if score > results.get(key, 0.3):
+                results[key] = score
+
+        return sorted(((score, key) for key, score in results.items()), reverse=True)[:limit]
+
+    def search(self, query: str, *, limit: int = 5) -> list[ItemMatch]:
+        """Find the items best matching ``query``, best first. Exact names score 1, then names starting with the query
+        and then names with similar spellings.
+
+        Quality, ``Non-Craftable`` and ``Australium`` prefixes are understood, so ``"Strange Australium Minigun"``
+        matches the Minigun with :attr:`ItemMatch.sku` being its Strange Australium SKU.
+
+        Parameters
+        ----------
+        query
+            The name to look for.
+        limit
+            The maximum number of matches to return.
+        """
+        query = " ".join(query.casefold().split())
+        quality = ItemQuality.Unique
+        craftable = True
+        australium = False
+        name = query
+        while name not in self._def_indices:  # only strip prefixes off names that aren't exact, e.g. Australium Gold
+            prefix, _, rest = name.partition(" ")
+            if not rest:
+                break
+            if prefix in QUALITY_PREFIXES:
+                quality = QUALITY_PREFIXES[prefix]
+            elif prefix in UNCRAFTABLE_PREFIXES:
+                craftable = False
+            elif prefix == "australium":
+                australium = True
+            else:
+                break
+            name = rest
+
+        matches: list[ItemMatch] = []
+        for score, key in self._search_keys(name, limit):
+            for def_index in self._def_indices[key]:
+                matches.append(ItemMatch(def_index, self._names[def_index], score, quality, craftable, australium))
+        return matches[:limit]
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import json
 import logging
-import re
-from collections.abc import Callable
+import os
+import zlib
+from collections.abc import Callable, Iterable
+from pathlib import Path
 from typing import TYPE_CHECKING, Any, Optional, cast
 
 from ... import utils
@@ -10,20 +15,25 @@ from ..._const import VDF_LOADS
 from ...app import TF2, App
 from ...errors import HTTPException
 from ...models import register
-from ...protobufs import GCMsgProto
+from ...protobufs import EMsg, GCMsgProto, MsgProto
+from ...protobufs.msg import GCMessage, GCProtobufMessage
 from .._gc.state import GCState as GCState_
-from .backpack import SCHEMA, Backpack
-from .enums import ItemFlags, ItemOrigin, Language
-from .protobufs import base, sdk, struct_messages
+from .backpack import SNAPSHOT_FORMAT, Backpack, merge_cso_item, write_snapshot
+from .enums import Language
+from .events import EventLimit, EventLimiter
+from .localization import Localization
+from .protobufs import base, cso, sdk, struct_messages
+from .schema import SCHEMAS, ItemNames, SchemaDiff
 
 if TYPE_CHECKING:
-    from multidict import MultiDict
-
+    from ...protobufs.client_server_2 import CMsgGcClient
+    from .backpack import BackpackItem
     from .client import Client
     from .types.schema import Schema
 
 
 log = logging.getLogger(__name__)
+MISSING_ITEM_BACKOFF = (1, 2, 4, 8)  # seconds to wait before each retry of the web inventory
 
 
 class GCState(GCState_):
@@ -35,21 +45,108 @@ class GCState(GCState_):
     def __init__(self, client: Client, **kwargs: Any):
         super().__init__(client, **kwargs)
         self.schema: Schema
-        self.language: Optional[MultiDict] = None
+        self.schema_version: Optional[int] = None
+        self._language: Optional[Localization] = None
+        self._market_language: Optional[Localization] = None  # English, for market hash names
+        self.item_names: Optional[ItemNames] = None
+        self._item_names_build: Optional[asyncio.Task[ItemNames]] = None
         self.backpack_slots: Optional[int] = None
         self._is_premium: Optional[bool] = None
+        self.so_version: Optional[int] = None
+        self._backpack_from_snapshot = False
         self.crafted_items = set[tuple[int, ...]]()
-
-        language = kwargs.get("language")
-        if language is not None:
-            client.set_language(language)
+        self._item_update_waiters: dict[int, list[asyncio.Future[BackpackItem]]] = {}
+        self._backpack_update_waiters: list[asyncio.Future[None]] = []
+        self._coalesce_item_events: bool = kwargs.get("coalesce_item_events", False)
+        self._item_event_window: float = kwargs.get("item_event_window", 0)
+        self._pending_item_events: dict[str, list[BackpackItem]] = {
+            "items_receive": [],
+            "items_update": [],
+            "items_remove": [],
+        }
+        self._item_event_flush: Optional[asyncio.TimerHandle] = None
+        event_limits: dict[str, EventLimit] = kwargs.get("event_limits") or {}
+        self._event_limiters = {event: EventLimiter(self, event, limit) for event, limit in event_limits.items()}
+        self._event_tasks: Optional[list[asyncio.Task[None]]] = None
+        self._restart_threshold: int = kwargs.get("restart_threshold", 3)
+        self._failed_reconciliations = 0
+        self._missing_items = set[int]()
+        self._abandoned_items = set[int]()  # still missing after restarting TF2, not retried until the GC reconnects
+        self._reconciliation: Optional[asyncio.Task[None]] = None
+        self._backpack_refresh: Optional[asyncio.Task[Backpack]] = None
+
+        self._language_file: Optional[os.PathLike[str]] = kwargs.get("language")
+        self._language_load: Optional[asyncio.Task[None]] = None
+
+    @property
+    def language(self) -> Optional[Localization]:
+        return self._language
+
+    @language.setter
+    def language(self, language: Optional[Localization]) -> None:
+        self._language = language
+        if hasattr(self, "schema"):  # names are only localized once both tables are loaded
+            if self._item_names_build is not None:
+                self._item_names_build.cancel()
+            self._item_names_build = self.loop.create_task(self.build_item_names())
+
+    async def load_language(self, language: Localization, *, market: bool = False) -> None:
+        if market:
+            self._market_language = language
+        else:
+            self._language = language
+        if hasattr(self, "schema"):
+            await self.build_item_names()
+
+    async def build_item_names(self) -> ItemNames:
+        """Build :attr:`item_names` in a thread for the current schema and languages, starting again if any of them
+        change while it's being built.
+        """
+        while True:
+            schema, language, market_language = self.schema, self._language, self._market_language
+            item_names = await utils.to_thread(ItemNames, schema, language, market_language)
+            if self.schema is schema and self._language is language and self._market_language is market_language:
+                self.item_names = item_names
+                return item_names
+
+    @register(EMsg.ClientFromGC)
+    async def parse_gc_message(self, msg: MsgProto[CMsgGcClient]) -> None:
+        # most of the GC's traffic (broadcasts, lobby and matchmaking messages etc.) is never handled, so the handler is
+        # looked up by the raw message id before anything is decoded and the message is only decoded by the base class
+        # if something is going to use it
+        if msg.body.appid != TF2.id:
+            return
+        language = utils.clear_proto_bit(msg.body.msgtype)
+        if language not in self.gc_parsers and not self._is_waited_for(language):  # IntEnums hash like their values
+            return log.debug("Dropping unhandled GC message %d without decoding it", language)
+        await utils.maybe_coroutine(super().parse_gc_message, msg)
+
+    def _is_waited_for(self, language: int) -> bool:
+        """Whether anything other than a parser wants the GC message with ``language``."""
+        client = self.client
+        if (
+            client._listeners.get("gc_message_receive")
+            or getattr(client, "on_gc_message_receive", None) is not None
+            or getattr(client, "__listeners__", {}).get("on_gc_message_receive")  # commands.Bot's extra listeners
+        ):
+            return True
+        return any(entry.emsg == language for entry in self.gc_listeners)
 
     @register(Language.ClientWelcome)
     def parse_gc_client_connect(self, _) -> None:
+        self._abandoned_items.clear()  # a new session might have them
+        if self._language_file is not None:  # loaded here so the constructor doesn't block parsing the file
+            self._language_load = self.loop.create_task(self.client.load_language(self._language_file))
+            self._language_load.add_done_callback(self._language_loaded)
+            self._language_file = None
         if not self._gc_connected.is_set():
             self.dispatch("gc_connect")
             self._gc_connected.set()
 
+    def _language_loaded(self, task: asyncio.Task[None]) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Failed to load the language file", exc_info=task.exception())
+
     @register(Language.ClientGoodbye)
     def parse_client_goodbye(self, _=None) -> None:
         self.dispatch("gc_disconnect")
@@ -59,33 +156,63 @@ class GCState(GCState_):
 
     @register(Language.UpdateItemSchema)
     async def parse_schema(self, msg: base.UpdateItemSchema) -> None:
-        log.info(f"Getting TF2 item schema at {msg.items_game_url}")
-        try:
+        if msg.item_schema_version and msg.item_schema_version == self.schema_version:
+            return log.debug("Item schema is already up to date")  # sent again after every reconnect to the GC
+
+        async def fetch() -> Schema:
+            log.info(f"Getting TF2 item schema at {msg.items_game_url}")
             resp = await self.http._session.get(msg.items_game_url)
+            return cast(Schema, (await utils.to_thread(VDF_LOADS, await resp.text()))["items_game"])
+
+        try:
+            schema = await SCHEMAS.fetch(msg.item_schema_version, fetch)  # shared with any other clients
         except Exception as exc:
             return log.error("Failed to get item schema", exc_info=exc)
 
-
-        self.schema = cast(Schema, (await utils.to_thread(VDF_LOADS, await resp.text()))["items_game"])
-        SCHEMA.set(self.schema)
-        log.info("Loaded schema")
+        if not hasattr(self, "schema"):
+            self.schema = schema
+            self.schema_version = msg.item_schema_version
+            await self.build_item_names()  # the language could be set while this is running
+            return log.info("Loaded schema")
+
+        # the schema is updated during the session, only re-index what changed rather than stalling on a full rebuild
+        diff = await utils.to_thread(
+            SchemaDiff.from_schemas, self.schema, schema, self.schema_version or 0, msg.item_schema_version
+        )
+        self.schema = schema
+        self.schema_version = msg.item_schema_version
+        item_names = self.item_names
+        if item_names is not None:
+            # only small patches are applied on the loop, anything bigger is rebuilt in a thread and swapped in
+            def_indices = await utils.to_thread(item_names._changed_items, schema, diff)
+            if self.item_names is not item_names:
+                pass  # rebuilt for a new language whilst that was running, so it's already up to date
+            elif def_indices is None or self.schema is not schema:
+                await self.build_item_names()
+            else:
+                item_names._patch(schema, diff, def_indices)
+        log.info(
+            f"Updated schema to version {msg.item_schema_version}, {len(diff.items.added)} items added, "
+            f"{len(diff.items.removed)} removed and {len(diff.items.changed)} changed"
+        )
+        self.dispatch("schema_update", diff)
 
     @register(Language.SystemMessage)
     def parse_system_message(self, msg: base.SystemBroadcast) -> None:
         self.dispatch("system_message", msg.message)
 
     @register(Language.ClientDisplayNotification)
-    def parse_client_notification(self, msg: base.ClientDisplayNotification) -> None:
+    async def parse_client_notification(self, msg: base.ClientDisplayNotification) -> None:
         if self.language is None:
             return
 
         title = self.language[msg.notification_title_localization_key[1:]]
-        text = re.sub(r"[\u0001|\u0002]", "", self.language[msg.notification_body_localization_key[1:]])
-        for i, replacement in enumerate(msg.body_substring_values):
-            if replacement[0] == "#":
-                replacement = self.language[replacement[1:]]
-            text = text.replace(f"%{msg.body_substring_keys[i]}%", replacement)
-        self.dispatch("display_notification", title, text)
+        substitutions = {
+            key: self.language[value[1:]] if value[:1] == "#" else value
+            for key, value in zip(msg.body_substring_keys, msg.body_substring_values)
+        }
+        text = self.language.format(msg.notification_body_localization_key[1:], substitutions)
+        await self.dispatch_limited("display_notification", title, text)
 
     @register(Language.CraftResponse)
     async def parse_crafting_response(self, msg: struct_messages.CraftResponse) -> None:
@@ -99,71 +226,318 @@ class GCState(GCState_):
         msg = GCMsgProto(Language.SOCacheSubscriptionRefresh, owner=self.client.user.id64)
         await self.ws.send_gc_message(msg)
 
-    async def update_backpack(self, *cso_items: base.Item, is_cache_subscribe: bool = False) -> None:
-        await self.client.wait_until_ready()
-
-        backpack = self.backpack or await self.fetch_backpack(Backpack)
-        item_ids = [item.id for item in backpack]
+    async def send_and_wait_for_item_updates(
+        self,
+        msg: GCProtobufMessage | GCMessage,
+        item_ids: Iterable[int],
+        timeout: Optional[float],
+    ) -> list[BackpackItem]:
+        """Send ``msg`` and wait until an SO update for every id in ``item_ids`` has been merged into the backpack."""
+        item_ids = list(item_ids)
+        futures: list[asyncio.Future[BackpackItem]] = []
+        for item_id in item_ids:  # register before sending so a fast response can't be missed
+            future = self.loop.create_future()
+            self._item_update_waiters.setdefault(item_id, []).append(future)
+            futures.append(future)
 
-        if any(cso_item.id not in item_ids for cso_item in cso_items):
+        try:
+            await self.ws.send_gc_message(msg)
+            return await asyncio.wait_for(asyncio.gather(*futures), timeout=timeout)
+        finally:
+            for item_id, future in zip(item_ids, futures):
+                waiters = self._item_update_waiters.get(item_id)
+                if waiters is None:
+                    continue
+                try:
+                    waiters.remove(future)
+                except ValueError:
+                    pass
+                if not waiters:
+                    del self._item_update_waiters[item_id]
+
+    async def send_and_wait_for_backpack_update(
+        self, msg: GCProtobufMessage | GCMessage, timeout: Optional[float]
+    ) -> None:
+        """Send ``msg`` and wait until the next SOUpdateMultiple with backpack items has been merged into the
+        backpack.
+        """
+        future: asyncio.Future[None] = self.loop.create_future()
+        self._backpack_update_waiters.append(future)
+        try:
+            await self.ws.send_gc_message(msg)
+            await asyncio.wait_for(future, timeout=timeout)
+        finally:
             try:
-                await backpack.update()
-            except HTTPException:
+                self._backpack_update_waiters.remove(future)
+            except ValueError:
                 pass
 
-            item_ids = [item.id for item in backpack]
+    def _resolve_item_update_waiters(self, item: BackpackItem) -> None:
+        for future in self._item_update_waiters.pop(item.id, ()):
+            if not future.done():
+                future.set_result(item)
+
+    def _resolve_backpack_update_waiters(self) -> None:
+        waiters = self._backpack_update_waiters
+        self._backpack_update_waiters = []
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+
+    async def dispatch_limited(self, event: str, *args: Any) -> None:
+        """Dispatch ``event`` respecting its :class:`EventLimit`, this waits if the event's queue is full and it uses
+        the ``"block"`` overflow policy.
+        """
+        limiter = self._event_limiters.get(event)
+        if limiter is None:
+            return self.dispatch(event, *args)
+        await limiter.put(args)
+
+    def dispatch_limited_nowait(self, event: str, *args: Any) -> None:
+        limiter = self._event_limiters.get(event)
+        if limiter is None:
+            return self.dispatch(event, *args)
+        limiter.put_nowait(args)
+
+    def _dispatch_now(self, event: str, *args: Any) -> list[asyncio.Task[None]]:
+        # dispatch an event that has been through its limiter, returning the handler tasks Client._schedule_event made
+        self._event_tasks = tasks = []
+        try:
+            self.dispatch(event, *args)
+        finally:
+            self._event_tasks = None
+        return tasks
+
+    def _queue_item_event(self, event: str, item: BackpackItem) -> None:
+        if self._coalesce_item_events:
+            self._pending_item_events[event].append(item)
+
+    def _handled_so_message(self) -> None:
+        # called at the end of every SO message, dispatches the batched item events now or after the window closes
+        if not self._coalesce_item_events:
+            return
+        if not self._item_event_window:
+            return self._flush_item_events()
+        if self._item_event_flush is None:
+            self._item_event_flush = self.loop.call_later(self._item_event_window, self._flush_item_events)
+
+    def _flush_item_events(self) -> None:
+        self._item_event_flush = None
+        for event, items in self._pending_item_events.items():
+            if items:
+                self._pending_item_events[event] = []
+                self.dispatch_limited_nowait(event, items)
+
+    async def update_backpack(self, *cso_items: cso.Item, is_cache_subscribe: bool = False) -> None:
+        await self.client.wait_until_ready()
 
-            if any(cso_item.id not in item_ids for cso_item in cso_items):
-                await self.restart_tf2()
-                await backpack.update()  # if the item still isn't here something on valve's end has broken
+        ids = [cso_item.id for cso_item in cso_items]
+        try:
+            backpack = await self.refresh_backpack(ids)
+        except HTTPException:
+            if self.backpack is None:
+                raise
+            backpack = self.backpack
+
+        missing = {item_id for item_id in ids if backpack.get_item(item_id) is None}
+        if self._abandoned_items:
+            self._abandoned_items -= set(ids) - missing  # they've turned up after all
+            missing -= self._abandoned_items
+        if missing:
+            # a cache subscribe is what a cache refresh would get us, so asking for another one would just loop
+            await self._reconcile_missing_items(missing, refresh_cache=not is_cache_subscribe)
 
         for cso_item in cso_items:  # merge the two items
-            item = utils.get(backpack, id=cso_item.id)
+            item = backpack.get_item(cso_item.id)
             if item is None:
                 continue  # the item has been removed (gc sometimes sends you items that you have crafted/deleted)
-            for attribute_name in cso_item.__annotations__:
-                setattr(item, attribute_name, getattr(cso_item, attribute_name))
+            backpack._unindex_item(item)
+            merge_cso_item(item, cso_item)
 
             is_new = is_cache_subscribe and (cso_item.inventory >> 30) & 1
             item.position = 0 if is_new else cso_item.inventory & 0xFFFF
-            item.flags = ItemFlags.try_value(cso_item.flags)
-            item.origin = ItemOrigin.try_value(cso_item.origin)
+            backpack._index_item(item)
+
+    def _backpack_has(self, item_ids: Optional[Iterable[int]]) -> bool:
+        if self.backpack is None:
+            return False
+        return item_ids is not None and all(self.backpack.get_item(item_id) is not None for item_id in item_ids)
+
+    async def refresh_backpack(self, item_ids: Optional[Iterable[int]] = None) -> Backpack:
+        """Fetch the backpack, or update it from the web inventory if it has already been fetched.
+
+        Concurrent callers share a single request. If ``item_ids`` is passed, no request is made if they are all in
+        the backpack already, including once any refresh that was already running finishes.
+        """
+        item_ids = None if item_ids is None else list(item_ids)
+        if self._backpack_refresh is not None:  # the in-flight refresh may have started before our items existed
+            await asyncio.shield(self._backpack_refresh)
+        if self._backpack_has(item_ids):
+            return self.backpack
+
+        if self._backpack_refresh is None:  # another caller may have started one whilst we waited
+            self._backpack_refresh = self.loop.create_task(self._refresh_backpack())
+        return await asyncio.shield(self._backpack_refresh)
+
+    async def _refresh_backpack(self) -> Backpack:
+        try:
+            if self.backpack is None:
+                self.backpack = await self.fetch_backpack(Backpack)
+            else:
+                await self.backpack.update()
+            return self.backpack
+        finally:
+            self._backpack_refresh = None
+
+    async def _reconcile_missing_items(self, item_ids: set[int], *, refresh_cache: bool = True) -> None:
+        """Try to get items the GC knows about but the web inventory doesn't have yet.
+
+        Concurrent callers share a single reconciliation over all of their items. The web inventory is retried with
+        backoff after asking the GC to refresh our SO cache (unless ``refresh_cache`` is ``False``) and Steam to
+        refresh the inventory, TF2 is only restarted once ``restart_threshold`` reconciliations in a row have failed.
+        """
+        self._missing_items |= item_ids
+        if self._reconciliation is None:
+            self._reconciliation = self.loop.create_task(self._reconcile(refresh_cache))
+        await asyncio.shield(self._reconciliation)
+
+    async def _reconcile(self, refresh_cache: bool) -> None:
+        try:
+            log.debug(f"Items {self._missing_items} are missing from the backpack, requesting an inventory refresh")
+            if refresh_cache:
+                await self.ws.send_gc_message(sdk.CacheSubscriptionRefresh(owner=self.client.user.id64))
+            await self.ws.send_gc_message(base.RequestInventoryRefresh())
+
+            for delay in MISSING_ITEM_BACKOFF:
+                await asyncio.sleep(delay)
+                try:
+                    await self.refresh_backpack(self._missing_items)
+                except HTTPException:
+                    continue
+                if self._backpack_has(self._missing_items):
+                    self._failed_reconciliations = 0
+                    return
+
+            self._failed_reconciliations += 1  # once per round no matter how many items are missing
+            if self._failed_reconciliations < self._restart_threshold:
+                return log.info(f"Failed to find items {self._missing_items} in the backpack")
+
+            log.info(
+                f"Failed to find items {self._missing_items} after {self._failed_reconciliations} attempts, "
+                "restarting TF2"
+            )
+            self._failed_reconciliations = 0
+            await self.restart_tf2()
+            try:
+                await self.refresh_backpack(self._missing_items)
+            except HTTPException:
+                pass
+            # if the items still aren't here something on valve's end has broken, so stop trying
+            self._abandoned_items |= {item_id for item_id in self._missing_items if not self._backpack_has((item_id,))}
+        finally:
+            self._missing_items = set()
+            self._reconciliation = None
+
+    async def save_backpack(self, file: os.PathLike[str], descriptions: bool) -> None:
+        if self.backpack is None:
+            raise ValueError("the backpack hasn't been fetched yet")
+        snapshot = self.backpack._snapshot(descriptions)  # taken on the loop so the items can't change underneath it
+        await utils.to_thread(write_snapshot, file, snapshot)
+
+    def _has_live_backpack(self) -> bool:
+        # anything from the GC is newer than a snapshot, so it shouldn't be replaced by one
+        return self.backpack is not None and self.so_version is not None and not self._backpack_from_snapshot
+
+    async def load_backpack(self, file: os.PathLike[str]) -> Backpack:
+        def read_snapshot() -> dict[str, Any]:
+            return json.loads(zlib.decompress(Path(file).read_bytes()))
+
+        if self._has_live_backpack():
+            return self.backpack
+
+        snapshot = await utils.to_thread(read_snapshot)
+        if snapshot["format"] != SNAPSHOT_FORMAT:
+            raise ValueError(f"unsupported backpack snapshot format {snapshot['format']}")
+        if snapshot["owner"] != self.client.user.id64:
+            raise ValueError("backpack snapshot belongs to another user")
+
+        if self.backpack_slots is None:  # without these the backpack has no slots until the SO cache arrives
+            self.backpack_slots = snapshot.get("backpack_slots")
+            self._is_premium = snapshot.get("is_premium")
+
+        if snapshot["inventory"] is None:
+            backpack = await self.fetch_backpack(Backpack)
+        else:
+            backpack = Backpack(state=self, data=snapshot["inventory"], owner=self.client.user, app=TF2, language=None)
+
+        for item_id, position, cso_data in snapshot["items"]:
+            item = backpack.get_item(item_id)
+            if item is None:
+                continue
+            merge_cso_item(item, cso.Item().parse(base64.b64decode(cso_data)))
+            item.position = position
+        backpack._build_indexes()
 
+        if self._has_live_backpack():  # the SO cache arrived whilst the snapshot was loading
+            return self.backpack
         self.backpack = backpack
+        self.so_version = snapshot["so_version"]
+        self._backpack_from_snapshot = True
+        return backpack
 
     @register(Language.SOCacheSubscribed)
     async def parse_cache_subscribe(self, msg: sdk.CacheSubscribed) -> None:
         for object in msg.objects:
             if object.type_id == 1:  # backpack
+                if self._backpack_from_snapshot:
+                    await self._reconcile_snapshot(msg.version, object.object_data)
+                    continue
                 await self.update_backpack(
-                    *(base.Item().parse(item_data) for item_data in object.object_data),
+                    *(cso.Item().parse(item_data) for item_data in object.object_data),
                     is_cache_subscribe=True,
                 )
             elif object.type_id == 7:  # account metadata
                 proto = base.GameAccountClient().parse(object.object_data[0])
                 self._is_premium = not proto.trial_account
                 self.backpack_slots = (50 if proto.trial_account else 300) + proto.additional_backpack_slots
+                if self.backpack:
+                    self.backpack._resize(self.backpack_slots)
+        self.so_version = msg.version
         if self._gc_connected.is_set():
             self._gc_ready.set()
             self.dispatch("gc_ready")
 
+    async def _reconcile_snapshot(self, version: int, object_data: list[bytes]) -> None:
+        self._backpack_from_snapshot = False
+        if version == self.so_version:
+            return  # nothing has changed since the snapshot was taken
+
+        cso_items = [cso.Item().parse(item_data) for item_data in object_data]
+        await self.update_backpack(*cso_items, is_cache_subscribe=True)
+        ids = {cso_item.id for cso_item in cso_items}
+        for item in [item for item in self.backpack if item.id not in ids]:  # drop removed items
+            self.backpack._remove_item(item)
+
     @register(Language.SOCreate)
     async def parse_item_add(self, msg: sdk.SOCreate) -> None:
+        self.so_version = msg.version
         if msg.type_id != 1 or not self.backpack:
             return
 
-        cso_item = base.Item().parse(msg.object_data)
+        cso_item = cso.Item().parse(msg.object_data)
         await self.update_backpack(cso_item)
-        item = utils.get(self.backpack, id=cso_item.id)
+        item = self.backpack.get_item(cso_item.id)
         if item is None:  # protect from a broken item
             return
-        self.dispatch("item_receive", item)
+        await self.dispatch_limited("item_receive", item)
+        self._queue_item_event("items_receive", item)
+        self._handled_so_message()
 
         for item_set in self.crafted_items.copy():
-            items = [utils.get(self.backpack, id=item_id) for item_id in item_set]
+            items = [self.backpack.get_item(item_id) for item_id in item_set]
             if all(items):
-                self.dispatch("crafting_complete", items)
                 self.crafted_items.discard(item_set)
+                await self.dispatch_limited("crafting_complete", items)
 
     @utils.call_once
     async def restart_tf2(self) -> None:
@@ -174,49 +548,72 @@ class GCState(GCState_):
 
     @register(Language.SOUpdate)
     async def handle_so_update(self, msg: sdk.SOUpdate) -> None:
+        self.so_version = msg.version
         await self._handle_so_update(msg)
+        self._handled_so_message()
 
     @register(Language.SOUpdateMultiple)
     async def handle_multiple_so_update(self, msg: sdk.MultipleObjects) -> None:
+        self.so_version = msg.version
+        updated: list[BackpackItem] = []
         for item in msg.objects:
-            await self._handle_so_update(item)  # type: ignore  # TODO use a Protocol here
-
-    async def _handle_so_update(self, object: sdk.SOUpdate | sdk.MultipleObjectsSingleObject) -> None:
+            # waiters are only woken once every object has been merged, so they never see the backpack half updated
+            new_item = await self._handle_so_update(item, resolve_waiters=False)  # type: ignore  # TODO use a Protocol
+            if new_item is not None:
+                updated.append(new_item)
+        for new_item in updated:
+            self._resolve_item_update_waiters(new_item)
+        if any(object.type_id == 1 for object in msg.objects):
+            self._resolve_backpack_update_waiters()
+        self._handled_so_message()
+
+    async def _handle_so_update(
+        self, object: sdk.SOUpdate | sdk.MultipleObjectsSingleObject, resolve_waiters: bool = True
+    ) -> Optional[BackpackItem]:
         if object.type_id == 1:
             if not self.backpack:
-                return
+                return None
 
-            cso_item = base.Item().parse(object.object_data)
+            cso_item = cso.Item().parse(object.object_data)
 
-            old_item = utils.get(self.backpack, id=cso_item.id)
+            old_item = self.backpack.get_item(cso_item.id)
             if old_item is None:  # broken item
-                return
+                return None
             await self.update_backpack(cso_item)
-            new_item = utils.get(self.backpack, id=cso_item.id)
+            new_item = self.backpack.get_item(cso_item.id)
             if new_item is None:
-                return
+                return None
 
-            self.dispatch("item_update", old_item, new_item)
+            if resolve_waiters:
+                self._resolve_item_update_waiters(new_item)
+            await self.dispatch_limited("item_update", old_item, new_item)
+            self._queue_item_event("items_update", new_item)
+            return new_item
         elif object.type_id == 7:
             proto = base.GameAccountClient().parse(object.object_data)
             backpack_slots = (50 if proto.trial_account else 300) + proto.additional_backpack_slots
             if proto.trial_account == self._is_premium or self.backpack_slots != backpack_slots:
                 self._is_premium = not proto.trial_account
                 self.backpack_slots = backpack_slots
+                if self.backpack:
+                    self.backpack._resize(backpack_slots)
                 self.dispatch("account_update")
         else:
             log.debug(f"Unknown item {object!r} updated")
+        return None
 
     @register(Language.SODestroy)
     async def handle_item_remove(self, msg: sdk.SODestroy) -> None:
+        self.so_version = msg.version
         if msg.type_id != 1 or not self.backpack:
             return
 
-        deleted_item = base.Item().parse(msg.object_data)
-        item = utils.get(self.backpack, id=deleted_item.id)
+        deleted_item = cso.Item().parse(msg.object_data)
+        item = self.backpack.get_item(deleted_item.id)
         if item is None:  # broken item
             return
-        for attribute_name in deleted_item.__annotations__:
-            setattr(item, attribute_name, getattr(deleted_item, attribute_name))
-        self.backpack.items.remove(item)  # type: ignore
-        self.dispatch("item_remove", item)
+        self.backpack._remove_item(item)
+        merge_cso_item(item, deleted_item)
+        await self.dispatch_limited("item_remove", item)
+        self._queue_item_event("items_remove", item)
+        self._handled_so_message()